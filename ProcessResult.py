@@ -1,42 +1,135 @@
 import streamlit as st
 import pandas as pd
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import os
 import time
+import logging
 
 # Assuming these functions are defined elsewhere
-from Processthreads import HospitalDataExtractor
+from Processthreads import HospitalDataExtractor, AsyncHospitalDataExtractor
 from Validater_agents import extract_hospital_data
+from source_filters import prune_collected_data, summarize_stats, remove_boilerplate, WINDOW_CHARS
+from tools.rate_limits import configure_limits
+from tools.progress import start_capture, stop_capture, drain, format_event, in_context
 
+logger = logging.getLogger(__name__)
 
-def process_single_hospital(hospital_name , openai_key , serper_api):
-    with st.spinner(f"Researching {hospital_name}..."):
+
+def research_hospital(hospital_name , openai_key , serper_api, mode=None, prune_window=WINDOW_CHARS,
+                      engine=None):
+    """
+    Run the full search/scrape/extract pipeline for one hospital without touching Streamlit.
+
+    prune_window is the number of characters kept around each category-relevant
+    match before the sources reach the LLM; 0 or None sends the full pages.
+    mode is the search/scrape engine, "threads" or "async"; when not given it is
+    read from KLAIM_SCRAPE_MODE.
+    engine is the LLM extraction engine, "crew", "structured" or "multi_field" (see extract_hospital_data).
+    """
+    mode = mode or os.environ.get("KLAIM_SCRAPE_MODE", "threads")
+    if mode == "async":
+        extractor = AsyncHospitalDataExtractor(serper_api, max_concurrency=20, max_per_host=3)
+    else:
         extractor = HospitalDataExtractor(serper_api ,max_threads=10)
-        optimize_data = extractor.run(hospital_name)
-        final_data = extract_hospital_data(optimize_data, openai_key , serper_api)
-        return final_data
+    optimize_data = extractor.run(hospital_name)
+    optimize_data, boilerplate_stats = remove_boilerplate(optimize_data)
+    logger.info(f"Boilerplate removal for {hospital_name}: {boilerplate_stats['lines_removed']} lines, "
+                f"{boilerplate_stats['tokens_removed']} tokens from {boilerplate_stats['domains']} domains")
+    if prune_window:
+        optimize_data, prune_stats = prune_collected_data(optimize_data, window=prune_window)
+        logger.info(f"Source pruning for {hospital_name}:\n{summarize_stats(prune_stats)}")
+    final_data = extract_hospital_data(optimize_data, openai_key, engine=engine)
+    return final_data
+
+def _render_progress(placeholder, history, progress_events, max_lines=12):
+    """Drain this run's queued progress events (main thread only) and show the latest ones."""
+    events = drain(progress_events)
+    if not events:
+        return
+    history.extend(format_event(event) for event in events)
+    del history[:-max_lines]
+    placeholder.code("\n".join(history), language=None)
+
+def process_single_hospital(hospital_name , openai_key , serper_api, mode=None, engine=None):
+    with st.spinner(f"Researching {hospital_name}..."):
+        progress_area = st.empty()
+        history = []
+        progress_events = start_capture()
+        try:
+            # The pipeline runs in a worker thread; this thread renders its progress events
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                future = executor.submit(in_context(research_hospital), hospital_name, openai_key, serper_api, mode,
+                                         engine=engine)
+                while not future.done():
+                    _render_progress(progress_area, history, progress_events)
+                    time.sleep(0.5)
+            return future.result()
+        finally:
+            stop_capture(progress_events)
+            progress_area.empty()
 
 # Function to process multiple hospitals from CSV
-def process_hospital_batch(hospital_list , openai_key , serper_api):
-    results = []
+def process_hospital_batch(hospital_list , openai_key , serper_api, max_workers=4, mode=None,
+                           serper_limit=None, openai_limit=None, scrape_limit=None, engine=None):
+    """
+    Process hospitals concurrently under one shared budget.
+
+    Args:
+        hospital_list (list): Hospital names
+        openai_key (str): OpenAI API key
+        serper_api (str): Serper API key
+        max_workers (int): Number of hospitals processed at the same time
+        mode (str): Search/scrape engine, "threads" or "async" (default: KLAIM_SCRAPE_MODE or "threads")
+        serper_limit, openai_limit, scrape_limit (int): Global caps shared by all workers
+        engine (str): LLM extraction engine, "crew", "structured" or "multi_field"
+
+    Returns:
+        list: One result per hospital, in input order
+    """
+    configure_limits(serper=serper_limit, openai=openai_limit, scrape=scrape_limit)
+
+    results = [None] * len(hospital_list)
     progress_bar = st.progress(0)
     status_text = st.empty()
-    
+    progress_area = st.empty()
+    history = []
+    progress_events = start_capture()
+
     total_hospitals = len(hospital_list)
-    
-    for i, hospital in enumerate(hospital_list):
-        status_text.text(f"Processing hospital {i+1}/{total_hospitals}: {hospital}")
-        try:
-            result = process_single_hospital(hospital, openai_key , serper_api)
-            results.append(result)
-        except Exception as e:
-            results.append({
-                'HCP NAME': hospital,
-                'STATUS': 'Error',
-                'ERROR_MESSAGE': str(e)
-            })
-        
-        # Update progress
-        progress_bar.progress((i + 1) / total_hospitals)
-    
+    completed = 0
+
+    # Worker threads have no Streamlit context, so all UI updates stay in this thread
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {
+                executor.submit(in_context(research_hospital), hospital, openai_key, serper_api, mode, engine=engine): i
+                for i, hospital in enumerate(hospital_list)
+            }
+            status_text.text(f"Processing {total_hospitals} hospitals with {max_workers} workers...")
+
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                _render_progress(progress_area, history, progress_events)
+                for future in done:
+                    i = futures[future]
+                    hospital = hospital_list[i]
+                    try:
+                        results[i] = future.result()
+                    except Exception as e:
+                        results[i] = {
+                            'HCP NAME': hospital,
+                            'STATUS': 'Error',
+                            'ERROR_MESSAGE': str(e)
+                        }
+
+                    # Update progress
+                    completed += 1
+                    status_text.text(f"Processed hospital {completed}/{total_hospitals}: {hospital}")
+                    progress_bar.progress(completed / total_hospitals)
+    finally:
+        stop_capture(progress_events)
+        progress_area.empty()
+
     status_text.text("Processing complete!")
     return results
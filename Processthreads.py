@@ -1,17 +1,67 @@
+import asyncio
+import functools
 import threading
 import time
 import logging
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, Future
 from typing import Dict, List, Any
 from tools.serper_search import hospital_info_search
 from tools.enhanced_scrape_website import advanced_scrape_website
+from tools.url_registry import UrlRegistry, normalize_url
+from tools.rate_limits import limit
+from tools.http_pool import pool_summary
+from tools.domain_health import get_domain_health
+from tools.site_crawler import find_official_site, crawl_official_site, is_scraped, CATEGORY_PATTERNS
+from tools.progress import in_context
+from tools.pdf_extract import is_pdf_url
+from urllib.parse import urlparse
 import types
-import streamlit as st
 
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+INFO_TYPES = [
+    'WEBSITE',
+    'PHONE',
+    'ADDRESS',
+    'CEO',
+    'MANAGEMENT_TEAM',
+    'INSURANCE',
+    'NO_OF_SPECIALTIES',
+    'NOOFDOCTORS',
+    'NETREVENUEYEARLY'
+]
+
+# Map info_type to category
+CATEGORY_MAPPING = {
+    'NETREVENUEYEARLY': 'revenue',
+    'NO_OF_SPECIALTIES': 'specialties',
+    'NOOFDOCTORS': 'doctors',
+    'CEO': 'ceo',
+    'WEBSITE': 'website',
+    'MANAGEMENT_TEAM': 'management',
+    'INSURANCE': 'insurance',
+    'PHONE': 'phone',
+    'ADDRESS': 'location'
+}
+
+# PDF extraction mode per info_type; annual reports only need their financial pages
+PDF_MODES = {
+    'NETREVENUEYEARLY': 'revenue'
+}
+
+# Search results per category
+MAX_RESULTS = 5
+# Search results still fetched for a category the official site crawl covered
+CRAWLED_MAX_RESULTS = 2
+
+
+def _finished(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
 class HospitalDataExtractor:
     def __init__(self, serper_api ,max_threads=10 ):
         self.max_threads = max_threads
@@ -28,6 +78,10 @@ class HospitalDataExtractor:
             'location': []
         }
         self.lock = threading.Lock()
+        self.url_registry = UrlRegistry()
+        self._stored = set()
+        # Categories covered by the official site crawl, set once it has finished
+        self._crawl_done = _finished(set())
         self.st = None
     
     def _thread_safe_write(self, message):
@@ -35,7 +89,88 @@ class HospitalDataExtractor:
         # If we're in a thread, just log instead of using streamlit
         logger.info(message)
     
-    def _process_info_type(self, hospital_name, info_type):
+    def _scrape(self, url, pdf_mode='text'):
+        # advanced_scrape_website reports progress through tools.progress, so it is safe to call from threads
+        with limit('scrape'):
+            return advanced_scrape_website(
+                url,
+                javascript=True if 'javascript' in url.lower() else False,
+                pdf_mode=pdf_mode
+            )
+    
+    @staticmethod
+    def _variant(url, pdf_mode):
+        # Only PDFs are extracted differently per mode; HTML pages are fetched once for every category
+        return pdf_mode if pdf_mode != 'text' and is_pdf_url(url) else None
+    
+    def _store_result(self, category, result, scraped_content):
+        with self.lock:
+            # The crawl and the searches can both find the same page for a category
+            key = (category, normalize_url(result['link']))
+            if key in self._stored:
+                return
+            self._stored.add(key)
+            self.collected_data[category].append({
+                "text": scraped_content,
+                "url": result['link'],
+                "metadata": {
+                    'title': result.get('title', ''),
+                    'snippet': result.get('snippet', '')
+                }
+            })
+    
+    def _crawl_official_site(self, hospital_name, max_workers=4):
+        """
+        Crawl the hospital's own site once the WEBSITE results are in and store
+        its pages under their categories. Returns the categories it covered.
+        Only a site that was actually scraped and matches the hospital name is crawled.
+        """
+        with self.lock:
+            scraped = [(entry['url'], entry['metadata'].get('title', ''))
+                       for entry in self.collected_data['website'] if is_scraped(entry['text'])]
+        site = find_official_site(scraped, hospital_name)
+        if not site:
+            logger.info(f"No WEBSITE result matches {hospital_name}, skipping the crawl")
+            return set()
+        
+        try:
+            pages = crawl_official_site(
+                site,
+                lambda url: self.url_registry.fetch(url, self._scrape),
+                max_workers=max_workers
+            )
+        except Exception as e:
+            logger.error(f"Error crawling {site}: {str(e)}")
+            return set()
+        
+        for category, entries in pages.items():
+            for entry in entries:
+                result = {
+                    'link': entry['url'],
+                    'title': f"Official site: {urlparse(entry['url']).path or '/'}",
+                    'snippet': ''
+                }
+                self._store_result(category, result, entry['text'])
+        return set(pages)
+    
+    def _process_website(self, hospital_name):
+        covered = set()
+        try:
+            self._process_info_type(hospital_name, 'WEBSITE')
+            covered = self._crawl_official_site(hospital_name)
+        finally:
+            self._crawl_done.set_result(covered)
+    
+    def _results_to_fetch(self, category, search_results, covered):
+        """
+        Search results worth fetching once the crawl has finished: a category
+        whose pages came from the official site only fetches the top few.
+        """
+        if category in covered:
+            return search_results[:CRAWLED_MAX_RESULTS]
+        return search_results
+    
+    def _process_info_type(self, hospital_name, info_type, max_results=MAX_RESULTS):
         logger.info(f"Processing {info_type} for {hospital_name}")
         
         try:
@@ -43,63 +178,23 @@ class HospitalDataExtractor:
                 hospital_name, 
                 self.serper_api ,
                 info_type,
-                max_results=5
+                max_results=max_results
             )
             
-            # Map info_type to category
-            category_mapping = {
-                'NETREVENUEYEARLY': 'revenue',
-                'NO_OF_SPECIALTIES': 'specialties', 
-                'NOOFDOCTORS': 'doctors',
-                'CEO': 'ceo',
-                'WEBSITE': 'website',
-                'MANAGEMENT_TEAM': 'management',
-                'INSURANCE': 'insurance',
-                'PHONE': 'phone',
-                'ADDRESS': 'location'
-            }
-            
-            category = category_mapping.get(info_type, 'other')
+            category = CATEGORY_MAPPING.get(info_type, 'other')
+            pdf_mode = PDF_MODES.get(info_type, 'text')
+            scrape = functools.partial(self._scrape, pdf_mode=pdf_mode)
+            if category in CATEGORY_PATTERNS:
+                # The search runs alongside the crawl; fetching waits to see what it covered
+                search_results = self._results_to_fetch(category, search_results, self._crawl_done.result())
             
             # Step 2: Process each search result
             for result in search_results:
                 if 'link' in result and result['link']:
                     try:
-                        # Create a patch for advanced_scrape_website to avoid Streamlit calls in threads
-                        def patched_scrape_website(url, selector=None, wait_time=0, javascript=False):
-                            # Override the st.write calls in advanced_scrape_website
-
-                            original_write = st.write
-
-                            def log_write(*args, **kwargs):
-                                message = " ".join([str(arg) for arg in args])
-                                logger.info(f"Scraper: {message}")
-                                return None
-                            
-                            # Patch st.write temporarily
-                            st.write = log_write
-                            st.error = log_write
-                            
-                            try:
-                                content = advanced_scrape_website(url, selector, wait_time, javascript)
-                                return content
-                            finally:
-
-                                st.write = original_write
-
-                        scraped_content = patched_scrape_website(
-                            result['link'],
-                            javascript=True if 'javascript' in result['link'].lower() else False
-                        )
-                        with self.lock:
-                            self.collected_data[category].append({
-                                "text": scraped_content,
-                                "url": result['link'],
-                                "metadata": {
-                                    'title': result.get('title', ''),
-                                    'snippet': result.get('snippet', '')
-                                }
-                            })
+                        scraped_content = self.url_registry.fetch(result['link'], scrape,
+                                                                  variant=self._variant(result['link'], pdf_mode))
+                        self._store_result(category, result, scraped_content)
                     
                     except Exception as e:
                         logger.error(f"Error scraping {result['link']}: {str(e)}")
@@ -114,24 +209,17 @@ class HospitalDataExtractor:
         start_time = time.time()
         logger.info(f"Starting parallel data extraction for: {hospital_name}")
         
-        info_types = [
-            'WEBSITE',           
-            'PHONE',             
-            'ADDRESS',           
-            'CEO',              
-            'MANAGEMENT_TEAM',   
-            'INSURANCE',         
-            'NO_OF_SPECIALTIES', 
-            'NOOFDOCTORS',       
-            'NETREVENUEYEARLY'   
-        ]
-        
-        # Use a thread pool to process the info types in parallel
+        # Use a thread pool to process the info types in parallel. WEBSITE is
+        # followed by the official site crawl in the same task; categories the
+        # crawl can cover search meanwhile and fetch fewer results once it is done.
+        self._crawl_done = Future()
         with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
             # Submit all tasks to the executor
-            futures = [
-                executor.submit(self._process_info_type, hospital_name, info_type)
-                for info_type in info_types
+            futures = [executor.submit(in_context(self._process_website), hospital_name)]
+            futures += [
+                executor.submit(in_context(self._process_info_type), hospital_name, info_type)
+                for info_type in INFO_TYPES
+                if info_type != 'WEBSITE'
             ]
             
             # Wait for all tasks to complete
@@ -140,5 +228,117 @@ class HospitalDataExtractor:
         
         end_time = time.time()
         logger.info(f"Data extraction completed in {end_time - start_time:.2f} seconds")
+        logger.info(f"URL registry: {self.url_registry.stats()}")
+        logger.info(f"HTTP connection pool: {pool_summary()}")
+        logger.info(f"Domain health: {get_domain_health().stats()}")
+        
+        return self.collected_data
+
+
+class AsyncHospitalDataExtractor(HospitalDataExtractor):
+    """
+    Asyncio engine for HospitalDataExtractor.
+    
+    Every search and every URL fetch is scheduled at once instead of scraping
+    each category's links one after another. The blocking search/scrape helpers
+    run on a dedicated thread pool, bounded by a global limit and a per-host
+    limit so a single hospital site is not hammered. Returns the same
+    collected_data shape as the threaded engine.
+    
+    Args:
+        serper_api (str): Serper API key
+        max_concurrency (int): Maximum number of searches/fetches in flight
+        max_per_host (int): Maximum number of concurrent fetches per host
+    """
+    def __init__(self, serper_api, max_concurrency=20, max_per_host=3):
+        super().__init__(serper_api, max_threads=max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+    
+    async def _call(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(in_context(func), *args, **kwargs))
+    
+    def _host_limit(self, url):
+        host = urlparse(url).netloc.lower()
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.max_per_host)
+        return self._host_limits[host]
+    
+    async def _fetch_result(self, category, result, pdf_mode='text'):
+        url = result['link']
+        future, owner = self.url_registry.claim(url, self._variant(url, pdf_mode))
+        try:
+            if owner:
+                try:
+                    async with self._global_limit, self._host_limit(url):
+                        future.set_result(await self._call(self._scrape, url, pdf_mode=pdf_mode))
+                except Exception as e:
+                    future.set_exception(e)
+            scraped_content = await asyncio.wrap_future(future)
+            self._store_result(category, result, scraped_content)
+        except Exception as e:
+            logger.error(f"Error scraping {url}: {str(e)}")
+    
+    async def _process_info_type_async(self, hospital_name, info_type, max_results=MAX_RESULTS):
+        logger.info(f"Processing {info_type} for {hospital_name}")
+        
+        try:
+            async with self._global_limit:
+                search_results = await self._call(
+                    hospital_info_search,
+                    hospital_name,
+                    self.serper_api,
+                    info_type,
+                    max_results=max_results
+                )
+            
+            category = CATEGORY_MAPPING.get(info_type, 'other')
+            pdf_mode = PDF_MODES.get(info_type, 'text')
+            if category in CATEGORY_PATTERNS:
+                covered = await asyncio.wrap_future(self._crawl_done)
+                search_results = self._results_to_fetch(category, search_results, covered)
+            await asyncio.gather(*[
+                self._fetch_result(category, result, pdf_mode)
+                for result in search_results
+                if isinstance(result, dict) and result.get('link')
+            ])
+            return True
+        
+        except Exception as e:
+            logger.error(f"Error processing {info_type}: {str(e)}")
+            return False
+    
+    async def _process_website_async(self, hospital_name):
+        covered = set()
+        try:
+            await self._process_info_type_async(hospital_name, 'WEBSITE')
+            covered = await self._call(self._crawl_official_site, hospital_name, max_workers=self.max_per_host)
+        finally:
+            self._crawl_done.set_result(covered)
+    
+    async def run_async(self, hospital_name):
+        start_time = time.time()
+        logger.info(f"Starting async data extraction for: {hospital_name}")
+        
+        self._global_limit = asyncio.Semaphore(self.max_concurrency)
+        self._host_limits = {}
+        self._crawl_done = Future()
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            self._executor = executor
+            await asyncio.gather(self._process_website_async(hospital_name), *[
+                self._process_info_type_async(hospital_name, info_type)
+                for info_type in INFO_TYPES
+                if info_type != 'WEBSITE'
+            ])
+        
+        end_time = time.time()
+        logger.info(f"Data extraction completed in {end_time - start_time:.2f} seconds")
+        logger.info(f"URL registry: {self.url_registry.stats()}")
+        logger.info(f"HTTP connection pool: {pool_summary()}")
+        logger.info(f"Domain health: {get_domain_health().stats()}")
         
         return self.collected_data
+    
+    def run(self, hospital_name):
+        return asyncio.run(self.run_async(hospital_name))
@@ -1,23 +1,37 @@
 from crewai import Agent, Task, Crew
+import os
 import json
 import litellm
 from typing import List, Dict, Any
-import tiktoken
-def count_tokens(text: str, model: str = "gpt-4") -> int:
-    """Count the number of tokens in a text string."""
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-        return len(encoding.encode(text))
-    except Exception as e:
-        return len(text.split()) * 1.5  
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from token_accounting import count_tokens_batch, TokenLedger
+from source_filters import collapse_near_duplicates
+import structured_extraction
+from pre_extractors import pre_extract, is_decisive, PRE_EXTRACTORS
+from tools.llm_cache import cached_kickoff, cache_stats
+from consensus import (resolve_consensus, fallback_entry, parse_coordinator_result, FIELD_KEYS, CONSENSUS_THRESHOLD,
+                       MIN_AGREEING_COUNT)
+def _kickoff(crew):
+    """
+    Run a crew while holding a slot of the shared OpenAI budget.
 
-def chunk_sources(sources, max_tokens=100000):
+    Identical crews (same agents and task descriptions) are served from the LLM cache.
+    """
+    return cached_kickoff(crew)
+
+def chunk_sources(sources, max_tokens=100000, ledger=None, field=None):
     """
     Split sources into chunks based on token count
     
+    Each source is tokenized once: its header and paragraphs are counted in a
+    single batch, and those counts are reused when a large source has to be
+    split across chunks.
+    
     Args:
         sources (list): List of source dictionaries with 'url' and 'text' keys
         max_tokens (int): Maximum number of tokens per chunk
+        ledger (TokenLedger): Optional per-run ledger to record token counts in
+        field (str): Field name used for the ledger entry
         
     Returns:
         list: List of chunks, where each chunk is a list of source dictionaries
@@ -40,16 +54,13 @@ def chunk_sources(sources, max_tokens=100000):
             print(f"Warning: Skipping invalid source: {source}")
             continue
         
-        source_text = f"SOURCE URL: {source['url']}\n{source['text']}"
-        source_tokens = count_tokens(source_text)
-        
-        # Ensure source_tokens is an integer
-        if not isinstance(source_tokens, int):
-            try:
-                source_tokens = int(source_tokens)
-            except (ValueError, TypeError):
-                print(f"Warning: Invalid token count '{source_tokens}', using estimate")
-                source_tokens = len(source_text.split()) * 2  # Rough estimate
+        header = f"SOURCE URL: {source['url']}\n"
+        paragraphs = str(source['text']).split('\n\n')
+        counts = count_tokens_batch([header] + paragraphs)
+        header_tokens, paragraph_tokens = counts[0], counts[1:]
+        source_tokens = header_tokens + sum(paragraph_tokens)
+        if ledger is not None:
+            ledger.record(field or 'unknown', source_tokens)
         
         if current_tokens + source_tokens > max_tokens and current_chunk:
             chunks.append(current_chunk)
@@ -58,41 +69,22 @@ def chunk_sources(sources, max_tokens=100000):
 
         if source_tokens > max_tokens:
             # Handle large sources by splitting into paragraphs
-            paragraphs = source['text'].split('\n\n')
-            temp_source = {'url': source['url'], 'text': ''}
+            temp_source = dict(source, text='')
             
-            for paragraph in paragraphs:
-                paragraph_tokens = count_tokens(paragraph)
-                
-                # Ensure paragraph_tokens is an integer
-                if not isinstance(paragraph_tokens, int):
-                    try:
-                        paragraph_tokens = int(paragraph_tokens)
-                    except (ValueError, TypeError):
-                        paragraph_tokens = len(paragraph.split()) * 2  # Rough estimate
-                
-                if current_tokens + paragraph_tokens > max_tokens and temp_source['text']:
+            for paragraph, tokens in zip(paragraphs, paragraph_tokens):
+                if current_tokens + tokens > max_tokens and temp_source['text']:
                     current_chunk.append(temp_source)
                     chunks.append(current_chunk)
                     current_chunk = []
                     current_tokens = 0
-                    temp_source = {'url': source['url'], 'text': ''}
+                    temp_source = dict(source, text='')
                 
                 temp_source['text'] += paragraph + '\n\n'
-                current_tokens += paragraph_tokens
+                current_tokens += tokens
             
             if temp_source['text']:
                 current_chunk.append(temp_source)
-                temp_text_tokens = count_tokens(f"SOURCE URL: {temp_source['url']}\n{temp_source['text']}")
-                
-                # Ensure temp_text_tokens is an integer
-                if not isinstance(temp_text_tokens, int):
-                    try:
-                        temp_text_tokens = int(temp_text_tokens)
-                    except (ValueError, TypeError):
-                        temp_text_tokens = len(temp_source['text'].split()) * 2  # Rough estimate
-                
-                current_tokens += temp_text_tokens
+                current_tokens += header_tokens
         else:
             current_chunk.append(source)
             current_tokens += source_tokens
@@ -102,9 +94,16 @@ def chunk_sources(sources, max_tokens=100000):
     
     return chunks
     
-def create_chunked_task(agent, task_type, sources_chunk, chunk_index, total_chunks):
-    """Generic function to create a task with chunked data."""
-    sources_text = "\n\n".join([f"SOURCE {i+1} URL: {source['url']}\n{source['text']}" 
+def _also_published_at(source):
+    """Extra URLs of a source that stands for several near-identical pages."""
+    duplicate_urls = source.get('duplicate_urls') or []
+    if not duplicate_urls:
+        return ""
+    return f" (same text also published at: {', '.join(duplicate_urls)})"
+
+def build_chunk_prompt(task_type, sources_chunk, chunk_index, total_chunks):
+    """Instructions for extracting one field from a chunk of sources, shared by both engines."""
+    sources_text = "\n\n".join([f"SOURCE {i+1} URL: {source['url']}{_also_published_at(source)}\n{source['text']}" 
                                for i, source in enumerate(sources_chunk)])
     
     task_descriptions = {
@@ -345,8 +344,43 @@ def create_chunked_task(agent, task_type, sources_chunk, chunk_index, total_chun
             """
     }
     
+    return task_descriptions[task_type]
+
+MULTI_FIELD_INSTRUCTIONS = {
+    "revenue": 'yearly net revenue figures, e.g. "$X million/billion (YYYY)"',
+    "specialties": 'numbers of medical specialties, e.g. "42"',
+    "doctors": 'numbers of doctors or physicians on staff, e.g. "157"',
+    "ceo": 'CEO names, e.g. "Jane Smith, Chief Executive Officer"',
+    "url": 'official website URLs, e.g. "https://www.hospitalabc.org"',
+    "management": 'management team members, e.g. "John Doe, CFO; Jane Smith, COO"',
+    "insurance": 'accepted insurance providers, e.g. "Daman, Thiqa, AXA"',
+    "phone": 'hospital phone numbers, e.g. "+971 4 377 7777"',
+    "location": 'UAE locations only, e.g. "Emirate: Dubai, Area: Healthcare City, Location: Building 37, Al Razi Street"'
+}
+
+def build_multi_field_prompt(sources_chunk, chunk_index, total_chunks):
+    """Instructions for extracting every field from a chunk of sources in a single call."""
+    sources_text = "\n\n".join([f"SOURCE {i+1} URL: {source['url']}{_also_published_at(source)}\n{source['text']}" 
+                               for i, source in enumerate(sources_chunk)])
+    field_lines = "\n".join(f"            - {field}: {instruction}" for field, instruction in MULTI_FIELD_INSTRUCTIONS.items())
+    
+    return f"""
+            Extract ALL of the following hospital details from this data chunk ({chunk_index+1} of {total_chunks}):
+            
+{field_lines}
+            
+            {sources_text}
+            
+            IMPORTANT:
+            1. Extract ALL values you can find from EACH source, for every field
+            2. Include the source URL for each extracted value
+            3. Leave a field's list empty when no source mentions it
+            """
+
+def create_chunked_task(agent, task_type, sources_chunk, chunk_index, total_chunks):
+    """Generic function to create a task with chunked data."""
     return Task(
-        description=task_descriptions[task_type],
+        description=build_chunk_prompt(task_type, sources_chunk, chunk_index, total_chunks),
         agent=agent,
         expected_output=f"JSON with extracted {task_type} data from chunk {chunk_index+1} of {total_chunks}"
     )
@@ -389,7 +423,112 @@ def create_aggregation_task(agent, task_type, all_chunk_results):
         expected_output=f"Aggregated JSON with most common {task_type} and all values"
     )
 
-def process_field_with_chunking(agent, field_type, field_data, max_tokens=100000):
+def _run_chunk(agent, field_type, chunk, i, total_chunks):
+    """Run one chunk through its own crew and return the extracted chunk_results list."""
+    task = create_chunked_task(agent, field_type, chunk, i, total_chunks)
+    crew = Crew(agents=[agent], tasks=[task], verbose=True, process="sequential")
+    all_chunk_results = []
+    
+    try:
+        chunk_result = _kickoff(crew)
+        if isinstance(chunk_result, str):
+            try:
+                parsed_result = json.loads(chunk_result)
+                if "chunk_results" in parsed_result:
+                    all_chunk_results.extend(parsed_result["chunk_results"])
+            except json.JSONDecodeError:
+                print(f"Error parsing chunk {i} result for {field_type}")
+        else:
+            try:
+                result_text = str(chunk_result)
+                import re
+                json_match = re.search(r'```json\s*(.*?)\s*```', result_text, re.DOTALL)
+                if json_match:
+                    json_str = json_match.group(1)
+                    parsed_result = json.loads(json_str)
+                    if "chunk_results" in parsed_result:
+                        all_chunk_results.extend(parsed_result["chunk_results"])
+                else:
+                    try:
+                        parsed_result = json.loads(result_text)
+                        if "chunk_results" in parsed_result:
+                            all_chunk_results.extend(parsed_result["chunk_results"])
+                    except:
+                        print(f"Could not extract JSON from CrewOutput for chunk {i}")
+            except Exception as e:
+                print(f"Error processing CrewOutput for chunk {i}: {str(e)}")
+    except Exception as e:
+        print(f"Error processing chunk {i} for {field_type}: {str(e)}")
+    
+    return all_chunk_results
+
+def _run_chunk_structured(client, field_type, chunk, i, total_chunks):
+    """Send one chunk's instructions straight to the chat API and return its chunk_results list."""
+    try:
+        return structured_extraction.extract_chunk(client, build_chunk_prompt(field_type, chunk, i, total_chunks))
+    except Exception as e:
+        print(f"Error processing chunk {i} for {field_type}: {str(e)}")
+        return []
+
+def merge_sources_by_url(normalized_data, source_fields):
+    """
+    Merge the per-field source lists into one list with each URL once.
+
+    A page stored under several fields may have been pruned differently for
+    each, so the distinct texts of a URL are concatenated.
+    """
+    merged = {}
+    for source_field in source_fields:
+        for source in normalized_data.get(source_field, []):
+            entry = merged.get(source['url'])
+            if entry is None:
+                merged[source['url']] = dict(source, duplicate_urls=list(source.get('duplicate_urls') or []))
+                continue
+            text = str(source['text'])
+            if text and text not in entry['text']:
+                entry['text'] = f"{entry['text']}\n\n{text}"
+            for url in source.get('duplicate_urls') or []:
+                if url not in entry['duplicate_urls']:
+                    entry['duplicate_urls'].append(url)
+    return list(merged.values())
+
+def _run_chunk_all_fields(client, chunk, i, total_chunks):
+    """Extract every field from one chunk with a single call; returns {field: chunk_results}."""
+    try:
+        return structured_extraction.extract_chunk_all_fields(client, build_multi_field_prompt(chunk, i, total_chunks))
+    except Exception as e:
+        print(f"Error processing multi-field chunk {i}: {str(e)}")
+        return {}
+
+def process_all_fields_with_chunking(sources, client, max_tokens=100000, max_chunk_workers=4, ledger=None):
+    """
+    Send each distinct source to the LLM once and extract all fields together.
+    
+    Returns:
+        dict: field -> JSON string in the same shape as process_field_with_chunking
+    """
+    chunks = chunk_sources(sources, max_tokens, ledger=ledger, field='all_fields')
+    print(f"Split {len(sources)} distinct sources into {len(chunks)} multi-field chunks")
+    
+    chunk_outputs = [{} for _ in chunks]
+    with ThreadPoolExecutor(max_workers=max(1, min(max_chunk_workers, len(chunks) or 1))) as executor:
+        futures = {
+            executor.submit(_run_chunk_all_fields, client, chunk, i, len(chunks)): i
+            for i, chunk in enumerate(chunks)
+        }
+        for future in as_completed(futures):
+            chunk_outputs[futures[future]] = future.result()
+    
+    field_results = {}
+    for field in structured_extraction.MULTI_FIELDS:
+        values = []
+        for chunk_output in chunk_outputs:
+            values.extend(chunk_output.get(field, []))
+        field_results[field] = manually_aggregate_results(values)
+    return field_results
+
+def process_field_with_chunking(agent, field_type, field_data, max_tokens=100000, max_chunk_workers=4, ledger=None,
+                                engine="crew", client=None):
     """
     Process a field by chunking the data and running the agent
     
@@ -398,6 +537,11 @@ def process_field_with_chunking(agent, field_type, field_data, max_tokens=100000
         field_type (str): Type of field to process
         field_data (list): List of field data
         max_tokens (int): Maximum number of tokens per chunk
+        max_chunk_workers (int): Maximum number of chunks processed concurrently
+        ledger (TokenLedger): Optional per-run token ledger
+        engine (str): "crew" runs a Crew per chunk; "structured" calls the chat
+            API directly with a strict chunk_results JSON schema
+        client: OpenAI client, required for the structured engine
         
     Returns:
         str: JSON string with processed results
@@ -420,50 +564,42 @@ def process_field_with_chunking(agent, field_type, field_data, max_tokens=100000
             "all_values": []
         })
     
-    chunks = chunk_sources(field_data, max_tokens)
+    chunks = chunk_sources(field_data, max_tokens, ledger=ledger, field=field_type)
     print(f"Split {field_type} data into {len(chunks)} chunks")
-    all_chunk_results = []
     
-    for i, chunk in enumerate(chunks):
-        task = create_chunked_task(agent, field_type, chunk, i, len(chunks))
-        crew = Crew(agents=[agent], tasks=[task], verbose=True, process="sequential")
-        
-        try:
-            chunk_result = crew.kickoff()
-            if isinstance(chunk_result, str):
-                try:
-                    parsed_result = json.loads(chunk_result)
-                    if "chunk_results" in parsed_result:
-                        all_chunk_results.extend(parsed_result["chunk_results"])
-                except json.JSONDecodeError:
-                    print(f"Error parsing chunk {i} result for {field_type}")
+    # Chunks are independent, so dispatch them concurrently and merge in chunk order.
+    # Each concurrent chunk gets its own copy of the agent to avoid sharing executor state.
+    structured = engine == "structured"
+    chunk_outputs = [[] for _ in chunks]
+    if len(chunks) > 1 and max_chunk_workers > 1:
+        with ThreadPoolExecutor(max_workers=min(max_chunk_workers, len(chunks))) as executor:
+            futures = {
+                (executor.submit(_run_chunk_structured, client, field_type, chunk, i, len(chunks)) if structured
+                 else executor.submit(_run_chunk, agent.copy(), field_type, chunk, i, len(chunks))): i
+                for i, chunk in enumerate(chunks)
+            }
+            for future in as_completed(futures):
+                chunk_outputs[futures[future]] = future.result()
+    else:
+        for i, chunk in enumerate(chunks):
+            if structured:
+                chunk_outputs[i] = _run_chunk_structured(client, field_type, chunk, i, len(chunks))
             else:
-                try:
-                    result_text = str(chunk_result)
-                    import re
-                    json_match = re.search(r'```json\s*(.*?)\s*```', result_text, re.DOTALL)
-                    if json_match:
-                        json_str = json_match.group(1)
-                        parsed_result = json.loads(json_str)
-                        if "chunk_results" in parsed_result:
-                            all_chunk_results.extend(parsed_result["chunk_results"])
-                    else:
-                        try:
-                            parsed_result = json.loads(result_text)
-                            if "chunk_results" in parsed_result:
-                                all_chunk_results.extend(parsed_result["chunk_results"])
-                        except:
-                            print(f"Could not extract JSON from CrewOutput for chunk {i}")
-                except Exception as e:
-                    print(f"Error processing CrewOutput for chunk {i}: {str(e)}")
-        except Exception as e:
-            print(f"Error processing chunk {i} for {field_type}: {str(e)}")
+                chunk_outputs[i] = _run_chunk(agent, field_type, chunk, i, len(chunks))
+    
+    all_chunk_results = []
+    for chunk_output in chunk_outputs:
+        all_chunk_results.extend(chunk_output)
+    
+    # Structured output is already valid JSON, so chunks are merged without another LLM call
+    if structured and all_chunk_results:
+        return manually_aggregate_results(all_chunk_results)
     
     if len(chunks) > 1 and all_chunk_results:
         aggregation_task = create_aggregation_task(agent, field_type, all_chunk_results)
         aggregation_crew = Crew(agents=[agent], tasks=[aggregation_task], verbose=True, process="sequential")
         try:
-            final_result = aggregation_crew.kickoff()
+            final_result = _kickoff(aggregation_crew)
             if isinstance(final_result, str):
                 return final_result
             else:
@@ -753,7 +889,7 @@ def extract_hospital_data(raw_data_with_urls, openai_api_key, max_tokens=100000)
     coordinator_crew = Crew(agents=[coordinator_agent], tasks=[coordinator_task], verbose=True, process="sequential")
     
     try:
-        final_result = coordinator_crew.kickoff()
+        final_result = _kickoff(coordinator_crew)
         if isinstance(final_result, str):
             try:
                 return json.loads(final_result)
@@ -815,16 +951,35 @@ def manually_aggregate_results(chunk_results):
         "all_values": [
             {
                 "value": value,
-                "source_url": source_urls[0] if source_urls else ""
+                "source_url": source_urls[0] if source_urls else "",
+                "source_urls": source_urls,
+                "count": data["count"]
             }
             for value, data in value_counts.items()
             for source_urls in [data["source_urls"]]
-        ]
+        ],
+        "total_count": len(chunk_results)
     }
     
     return json.dumps(result)
-def extract_hospital_data(raw_data_with_urls, openai_api_key, max_tokens=100000):
+def extract_hospital_data(raw_data_with_urls, openai_api_key, max_tokens=100000, max_field_workers=9, engine=None,
+                          consensus_threshold=CONSENSUS_THRESHOLD, consensus_min_count=MIN_AGREEING_COUNT):
+    """
+    Extract every field from the collected sources and integrate them with the coordinator.
+
+    engine selects how chunks are processed: "crew" (default); "structured",
+    which calls the chat API with a strict JSON schema per field; or
+    "multi_field", which sends each distinct source once and extracts all
+    fields per call. When not given it is read from KLAIM_EXTRACTION_ENGINE.
+
+    A field whose most common value was extracted at least consensus_min_count
+    times and makes up at least consensus_threshold of its extracted values is
+    written to the result directly; only the remaining fields are sent to the
+    coordinator.
+    """
     litellm.api_key = openai_api_key
+    engine = engine or os.environ.get("KLAIM_EXTRACTION_ENGINE", "crew")
+    client = structured_extraction.get_client(openai_api_key) if engine in ("structured", "multi_field") else None
     normalized_data = {}
     
     # Define all agents
@@ -925,63 +1080,97 @@ def extract_hospital_data(raw_data_with_urls, openai_api_key, max_tokens=100000)
         else:
             normalized_data[field] = []
     
+    # Syndicated copies of the same blurb are sent to the LLM once, with all their URLs
+    for field, sources in normalized_data.items():
+        collapsed = collapse_near_duplicates(sources)
+        if len(collapsed) < len(sources):
+            print(f"{field}: collapsed {len(sources) - len(collapsed)} near-duplicate sources")
+        normalized_data[field] = collapsed
+    
     print("Normalized data structure:")
     for field, sources in normalized_data.items():
         print(f"{field}: {len(sources)} sources")
-    print("Processing revenue data...")
-    revenue_result = process_field_with_chunking(revenue_agent, "revenue", normalized_data['revenue'], max_tokens)
-    
-    print("Processing specialties data...")
-    specialties_result = process_field_with_chunking(specialties_agent, "specialties", normalized_data['specialties'], max_tokens)
-    
-    print("Processing doctors data...")
-    doctors_result = process_field_with_chunking(doctors_agent, "doctors", normalized_data['doctors'], max_tokens)
-    
-    print("Processing CEO data...")
-    ceo_result = process_field_with_chunking(ceo_agent, "ceo", normalized_data['ceo'], max_tokens)
-    
-    print("Processing URL data...")
-    url_result = process_field_with_chunking(url_agent, "url", normalized_data['website'], max_tokens)
-    
-    print("Processing management data...")
-    management_result = process_field_with_chunking(management_agent, "management", normalized_data['management'], max_tokens)
-    
-    print("Processing insurance data...")
-    insurance_result = process_field_with_chunking(insurance_agent, "insurance", normalized_data['insurance'], max_tokens)
-    
-    print("Processing phone data...")
-    phone_result = process_field_with_chunking(phone_agent, "phone", normalized_data['phone'], max_tokens)
-    
-    print("Processing location data...")
-    location_result = process_field_with_chunking(location_agent, "location", normalized_data['location'], max_tokens)
-    agent_results = {
-        'revenue': revenue_result,
-        'specialties': specialties_result,
-        'doctors': doctors_result,
-        'ceo': ceo_result,
-        'url': url_result,
-        'management': management_result,
-        'insurance': insurance_result,
-        'phone': phone_result,
-        'location': location_result
-    }
+    field_jobs = [
+        ('revenue', revenue_agent, 'revenue'),
+        ('specialties', specialties_agent, 'specialties'),
+        ('doctors', doctors_agent, 'doctors'),
+        ('ceo', ceo_agent, 'ceo'),
+        ('url', url_agent, 'website'),
+        ('management', management_agent, 'management'),
+        ('insurance', insurance_agent, 'insurance'),
+        ('phone', phone_agent, 'phone'),
+        ('location', location_agent, 'location')
+    ]
+
+    # Fields are independent until the coordinator step, so run them concurrently.
+    # Crew kickoffs share the global OpenAI budget from tools.rate_limits.
+    # Phone, website and location are usually settled by local patterns; the LLM
+    # is only asked when they find nothing or disagree
+    local_results = {}
+    for field_type, _, source_field in field_jobs:
+        if field_type not in PRE_EXTRACTORS:
+            continue
+        candidates = pre_extract(field_type, normalized_data[source_field])
+        if is_decisive(candidates):
+            print(f"{field_type}: resolved locally from {len(candidates)} candidates, skipping the LLM")
+            local_results[field_type] = manually_aggregate_results(candidates)
+    llm_jobs = [job for job in field_jobs if job[0] not in local_results]
+
+    field_results = {}
+    ledger = TokenLedger()
+    if engine == "multi_field":
+        merged_sources = merge_sources_by_url(normalized_data, [source_field for _, _, source_field in llm_jobs])
+        field_results = process_all_fields_with_chunking(merged_sources, client, max_tokens,
+                                                         max_chunk_workers=max_field_workers, ledger=ledger)
+        field_jobs_to_run = []
+    else:
+        field_jobs_to_run = llm_jobs
+    with ThreadPoolExecutor(max_workers=max(1, max_field_workers)) as executor:
+        futures = {}
+        for field_type, agent, source_field in field_jobs_to_run:
+            print(f"Processing {field_type} data...")
+            future = executor.submit(process_field_with_chunking, agent, field_type, normalized_data[source_field],
+                                     max_tokens, ledger=ledger, engine=engine, client=client)
+            futures[future] = field_type
 
+        for future in as_completed(futures):
+            field_type = futures[future]
+            try:
+                field_results[field_type] = future.result()
+            except Exception as e:
+                print(f"Error processing {field_type} data: {str(e)}")
+                field_results[field_type] = json.dumps({
+                    "most_common": {
+                        "value": "No data available",
+                        "count": 0,
+                        "source_urls": []
+                    },
+                    "all_values": []
+                })
+
+    field_results.update(local_results)
+    agent_results = {field_type: field_results[field_type] for field_type, _, _ in field_jobs}
+    print("Token usage by field:")
+    print(ledger.summary())
+    print(f"LLM cache: {cache_stats()}")
+
+    # Fields whose sources already agree are written out directly; the coordinator
+    # only sees the contested ones, and is skipped entirely when there are none
+    final_data, contested = resolve_consensus(agent_results, consensus_threshold, consensus_min_count)
+    print(f"Consensus: {len(final_data)} fields resolved locally, contested: {', '.join(contested) or 'none'}")
+    if not contested:
+        return final_data
+
+    contested_fields = "\n        ".join(f"{FIELD_KEYS[field]}: {agent_results[field]}" for field in contested)
+    first_key = FIELD_KEYS[contested[0]]
     coordinator_task = Task(
         description=f"""
         Integrate these extracted data points with multiple sources into a single, structured format:
         
-        NETREVENUEYEARLY: {agent_results['revenue']}
-        NO_OF_SPECIALTIES: {agent_results['specialties']}
-        NOOFDOCTORS: {agent_results['doctors']}
-        CEO: {agent_results['ceo']}
-        URL website: {agent_results['url']}
-        MANAGEMENT_TEAM: {agent_results['management']}
-        INSURANCE: {agent_results['insurance']}
-        Phone hospital: {agent_results['phone']}
-        UAE_LOCATION: {agent_results['location']}
+        {contested_fields}
         
-        Create a structured JSON object with all these fields:
-        1. For each field, use the "most_common" value as the primary value
+        Create a structured JSON object with exactly these keys: {', '.join(FIELD_KEYS[field] for field in contested)}
+        1. For each field, use the "most_common" value as the primary value unless the alternatives are clearly better supported
         2. Include source URLs for each piece of information
         3. Add confidence scores based on agreement across sources:
            - "High" if the same value appears in 3+ sources
@@ -991,19 +1180,7 @@ def extract_hospital_data(raw_data_with_urls, openai_api_key, max_tokens=100000)
         
         Format your response as a complete JSON object:
         {{
-            "NETREVENUEYEARLY": {{
-                "value": "...",
-                "source_urls": ["url1", "url2", ...],
-                "confidence": "High/Medium/Low",
-                "alternatives": [
-                    {{
-                        "value": "...",
-                        "source_urls": ["url3"]
-                    }},
-                    ...
-                ]
-            }},
-            "NO_OF_SPECIALTIES": {{
+            "{first_key}": {{
                 "value": "...",
                 "source_urls": ["url1", "url2", ...],
                 "confidence": "High/Medium/Low",
@@ -1015,26 +1192,25 @@ def extract_hospital_data(raw_data_with_urls, openai_api_key, max_tokens=100000)
                     ...
                 ]
             }},
-            ... and so on for all fields
+            ... and so on for the other keys listed above
         }}
         """,
         agent=coordinator_agent,
-        expected_output="Complete nested JSON with all data fields, confidence scores, and alternative values"
+        expected_output="Nested JSON with the contested data fields, confidence scores, and alternative values"
     )
     
     coordinator_crew = Crew(agents=[coordinator_agent], tasks=[coordinator_task], verbose=True)
     
     try:
-        final_result = coordinator_crew.kickoff()
-        if isinstance(final_result, str):
-            try:
-                return json.loads(final_result)
-            except:
-                return final_result
-        return final_result
+        coordinated = parse_coordinator_result(_kickoff(coordinator_crew))
     except Exception as e:
         print(f"Error in coordinator: {str(e)}")
-        return {
-            "raw_results": agent_results,
-            "error": str(e)
-        }
+        coordinated = {}
+    for field in contested:
+        key = FIELD_KEYS[field]
+        if isinstance(coordinated.get(key), dict):
+            final_data[key] = coordinated[key]
+        else:
+            print(f"Coordinator gave no usable {key}, keeping the most common value at Low confidence")
+            final_data[key] = fallback_entry(agent_results[field])
+    return final_data
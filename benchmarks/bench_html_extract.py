@@ -0,0 +1,81 @@
+"""
+Benchmark the HTML extraction engines over a saved corpus of hospital pages.
+
+    python benchmarks/bench_html_extract.py                   # run over benchmarks/corpus
+    python benchmarks/bench_html_extract.py --repeat 20
+    python benchmarks/bench_html_extract.py --save URL [URL ...]   # add live pages to the corpus
+
+Every engine is checked against the reference BeautifulSoup engine, so the
+report shows both the speed-up and whether the text is identical.
+"""
+import os
+import sys
+import glob
+import time
+import hashlib
+import argparse
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.html_extract import ENGINES
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+
+def save_pages(urls):
+    from tools.http_pool import get_session
+    os.makedirs(CORPUS_DIR, exist_ok=True)
+    for url in urls:
+        response = get_session(url).get(url, timeout=30, headers={
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        })
+        response.raise_for_status()
+        name = f"{urlparse(url).netloc}_{hashlib.sha1(url.encode()).hexdigest()[:8]}.html"
+        with open(os.path.join(CORPUS_DIR, name), "w", encoding="utf-8") as f:
+            f.write(response.text)
+        print(f"Saved {url} -> {name} ({len(response.text)} characters)")
+
+
+def load_corpus():
+    pages = []
+    for path in sorted(glob.glob(os.path.join(CORPUS_DIR, "*.html"))):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            pages.append((os.path.basename(path), f.read()))
+    return pages
+
+
+def run(repeat):
+    pages = load_corpus()
+    if not pages:
+        print(f"No pages in {CORPUS_DIR}; add some with --save URL")
+        return
+
+    print(f"{len(pages)} pages, {sum(len(html) for _, html in pages)} characters, {repeat} repetitions\n")
+    reference = {name: ENGINES['bs4'](html) for name, html in pages}
+    baseline = None
+
+    for engine_name, engine in ENGINES.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for _, html in pages:
+                engine(html)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        mismatches = [name for name, html in pages if engine(html) != reference[name]]
+        print(f"{engine_name:>6}: {elapsed * 1000 / (repeat * len(pages)):8.2f} ms/page   "
+              f"x{baseline / elapsed:5.1f}   identical: {len(pages) - len(mismatches)}/{len(pages)}")
+        for name in mismatches:
+            print(f"        differs: {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--save", nargs="+", metavar="URL")
+    args = parser.parse_args()
+
+    if args.save:
+        save_pages(args.save)
+    else:
+        run(args.repeat)
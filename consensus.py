@@ -0,0 +1,133 @@
+import re
+import json
+from typing import Dict, Optional, Tuple
+
+# Share of the extracted values that must agree for a field to skip the coordinator
+CONSENSUS_THRESHOLD = 0.6
+# ...and how many of them at least, so a single uncontradicted source is not consensus
+MIN_AGREEING_COUNT = 2
+
+# Field name in extract_hospital_data -> key in the final JSON
+FIELD_KEYS = {
+    'revenue': 'NETREVENUEYEARLY',
+    'specialties': 'NO_OF_SPECIALTIES',
+    'doctors': 'NOOFDOCTORS',
+    'ceo': 'CEO',
+    'url': 'WEBSITE',
+    'management': 'MANAGEMENT_TEAM',
+    'insurance': 'INSURANCE',
+    'phone': 'PHONE',
+    'location': 'UAE_LOCATION'
+}
+
+NO_DATA = "No data available"
+
+
+def confidence_for(count: int) -> str:
+    """Same rule the coordinator is given: 3+ agreeing sources is High, 2 is Medium, else Low."""
+    if count >= 3:
+        return "High"
+    if count == 2:
+        return "Medium"
+    return "Low"
+
+
+def parse_field_result(field_result) -> Optional[dict]:
+    """Field output as a dict, or None when it is not the expected most_common/all_values JSON."""
+    if isinstance(field_result, dict):
+        parsed = field_result
+    else:
+        text = str(field_result)
+        fenced = re.search(r'```(?:json)?\s*(.*?)\s*```', text, re.DOTALL)
+        try:
+            parsed = json.loads(fenced.group(1) if fenced else text)
+        except (TypeError, ValueError):
+            return None
+    if not isinstance(parsed, dict) or not isinstance(parsed.get('most_common'), dict):
+        return None
+    return parsed
+
+
+def build_entry(parsed: dict) -> dict:
+    """Final JSON entry of a field from its aggregated values."""
+    most_common = parsed['most_common']
+    value = most_common.get('value') or NO_DATA
+    alternatives = []
+    for item in parsed.get('all_values', []):
+        if not isinstance(item, dict) or item.get('value') in (None, '', value):
+            continue
+        urls = item.get('source_urls') or ([item['source_url']] if item.get('source_url') else [])
+        alternatives.append({'value': item['value'], 'source_urls': urls})
+    return {
+        'value': value,
+        'source_urls': most_common.get('source_urls', []),
+        'confidence': confidence_for(int(most_common.get('count') or 0)) if value != NO_DATA else "Low",
+        'alternatives': alternatives
+    }
+
+
+def agreement(parsed: dict) -> float:
+    """
+    Share of the extracted values that equal the most common one.
+
+    Outputs of the LLM aggregation step carry no total_count and may not list
+    every dissenting value, so they count as no agreement at all.
+    """
+    total = parsed.get('total_count')
+    if total is None:
+        return 0.0
+    count = int(parsed['most_common'].get('count') or 0)
+    total = max(int(total or 0), count)
+    return count / total if total else 0.0
+
+
+def resolve_consensus(field_results: Dict[str, str], threshold: float = CONSENSUS_THRESHOLD,
+                      min_count: int = MIN_AGREEING_COUNT) -> Tuple[dict, list]:
+    """
+    Build the final JSON for every field whose values agree enough.
+
+    A field is resolved directly when its most common value was extracted at
+    least min_count times and accounts for at least threshold of its extracted
+    values, or when nothing was found at all.
+
+    Returns:
+        tuple: (final data keyed by FIELD_KEYS for the resolved fields,
+        list of contested field names that still need the coordinator)
+    """
+    final_data = {}
+    contested = []
+    for field, key in FIELD_KEYS.items():
+        parsed = parse_field_result(field_results.get(field))
+        if parsed is None:
+            contested.append(field)
+            continue
+        value = parsed['most_common'].get('value')
+        count = int(parsed['most_common'].get('count') or 0)
+        if not value or value == NO_DATA or (count >= min_count and agreement(parsed) >= threshold):
+            final_data[key] = build_entry(parsed)
+        else:
+            contested.append(field)
+    return final_data, contested
+
+
+def fallback_entry(field_result) -> dict:
+    """Entry for a contested field when the coordinator gives no usable answer."""
+    parsed = parse_field_result(field_result)
+    if parsed is None:
+        return {'value': NO_DATA, 'source_urls': [], 'confidence': "Low", 'alternatives': []}
+    entry = build_entry(parsed)
+    entry['confidence'] = "Low"
+    return entry
+
+
+def parse_coordinator_result(result) -> dict:
+    """Coordinator output as a dict keyed by FIELD_KEYS values, or {} when it is not JSON."""
+    if isinstance(result, dict):
+        return result
+    text = str(getattr(result, 'raw', None) or result)
+    fenced = re.search(r'```(?:json)?\s*(.*?)\s*```', text, re.DOTALL)
+    try:
+        parsed = json.loads(fenced.group(1) if fenced else text)
+    except (TypeError, ValueError):
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
@@ -177,7 +177,7 @@ def main():
                                 else:
                                     with st.spinner(f"Processing {len(hospital_list)} hospitals..."):
 
-                                        results = process_hospital_batch(hospital_list,  st.session_state.openai_key)
+                                        results = process_hospital_batch(hospital_list,  st.session_state.openai_key , st.session_state.serper_key)
 
                                         results_df = pd.DataFrame(results)
 
@@ -0,0 +1,216 @@
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+from tools.site_crawler import is_directory
+
+# Share of the sources with a local match that must agree on the top value, and
+# the number of distinct sources that must agree, so one noisy match never decides
+DECISIVE_SHARE = 0.6
+MIN_AGREEING_SOURCES = 2
+
+# +971 / 00971 / 0 prefixed landlines (area code + 7 digits, "(04) 123 4567" too),
+# mobiles (5X + 7 digits) and 800/600 numbers ("600 5 67890" too)
+PHONE_PATTERN = re.compile(
+    r'(?<![\d+])(?:(?P<intl>(?:\+|00)\s?971)[\s.-]?\(?0?\)?[\s.-]?|(?P<paren>\()?\b0)'
+    r'(?P<area>5[024568]|[234679])(?(paren)\))(?P<sep>[\s.-]?)(?P<number>\d{3}[\s.-]?\d{4})(?!\d)'
+    r'|(?<![\d+])(?:(?P<tollfree_intl>(?:\+|00)\s?971)[\s.-]?)?'
+    r'(?P<tollfree>(?:800|600)[\s.-]?\d{2,3}[\s.-]?\d{2,4}|600[\s.-]?\d[\s.-]?\d{5})(?!\d)'
+)
+# Labels looked for just before a number. Numbers without +971 count only when
+# labelled as a phone or written with separators, so IDs such as "041234567"
+# are not taken for phones; numbers labelled as a fax are skipped.
+LABEL_WINDOW = 30
+PHONE_LABEL = re.compile(r'tel(?:ephone)?|phone|call|mob(?:ile)?|landline|toll[\s-]?free|hotline|whatsapp|\b[tpm]\s*:',
+                         re.IGNORECASE)
+FAX_LABEL = re.compile(r'fax|\bf\s*:', re.IGNORECASE)
+
+URL_PATTERN = re.compile(r'\b(?:https?://)?(?:www\.)?([a-z0-9][a-z0-9-]*(?:\.[a-z0-9-]+)*\.(?:ae|com|org|net|health|care|hospital))\b', re.IGNORECASE)
+EMAIL_PATTERN = re.compile(r'\b[\w.+-]+@((?:[\w-]+\.)+[a-z]{2,})\b', re.IGNORECASE)
+
+# Mailbox providers say nothing about the hospital's own domain
+WEBMAIL_DOMAINS = frozenset(['gmail.com', 'hotmail.com', 'yahoo.com', 'outlook.com', 'live.com', 'icloud.com', 'emirates.net.ae'])
+
+EMIRATES = {
+    'Abu Dhabi': ['Abu Dhabi'],
+    'Dubai': ['Dubai'],
+    'Sharjah': ['Sharjah'],
+    'Ajman': ['Ajman'],
+    'Umm Al Quwain': ['Umm Al Quwain', 'Umm Al-Quwain', 'UAQ'],
+    'Ras Al Khaimah': ['Ras Al Khaimah', 'Ras Al-Khaimah', 'RAK'],
+    'Fujairah': ['Fujairah'],
+    # Al Ain is in Abu Dhabi but is reported on its own by most sources
+    'Al Ain': ['Al Ain']
+}
+
+AREAS = {
+    'Dubai': ['Dubai Healthcare City', 'Healthcare City', 'Jumeirah', 'Al Barsha', 'Deira', 'Bur Dubai', 'Al Qusais',
+              'Mirdif', 'Dubai Marina', 'Al Garhoud', 'Oud Metha', 'Umm Suqeim', 'Al Karama', 'Business Bay',
+              'Dubai Silicon Oasis', 'Al Nahda', 'Jebel Ali', 'Motor City', 'Al Wasl', 'Al Jaddaf', 'Al Mankhool',
+              'Al Safa', 'Dubai Investments Park', 'Al Twar', 'Sheikh Zayed Road', 'Al Quoz', 'Arabian Ranches'],
+    'Abu Dhabi': ['Al Reem Island', 'Khalifa City', 'Mussafah', 'Musaffah', 'Al Mushrif', 'Al Khalidiyah', 'Al Bateen',
+                  'Mohammed Bin Zayed City', 'Al Maryah Island', 'Corniche', 'Shakhbout City', 'Al Shamkha',
+                  'Al Bahia', 'Baniyas', 'Al Mafraq', 'Al Dhafra', 'Madinat Zayed', 'Ruwais', 'Electra Street',
+                  'Hamdan Street', 'Al Muroor', 'Al Wahda'],
+    'Al Ain': ['Al Jimi', 'Tawam', 'Al Towayya', 'Al Mutaredh', 'Al Khabisi', 'Al Muwaiji', 'Al Hili'],
+    'Sharjah': ['Al Majaz', 'Al Nahda', 'Al Khan', 'Al Qasimia', 'Muwaileh', 'University City', 'Al Taawun',
+                'Al Zahra', 'Al Mamzar', 'Khor Fakkan', 'Kalba', 'Al Dhaid'],
+    'Ajman': ['Al Nuaimiya', 'Al Jurf', 'Al Rashidiya', 'Al Rawda', 'Al Jerf'],
+    'Ras Al Khaimah': ['Al Nakheel', 'Al Hamra', 'Khuzam', 'Al Qusaidat', 'Julphar'],
+    'Fujairah': ['Dibba', 'Masafi', 'Al Faseel', 'Merashid'],
+    'Umm Al Quwain': ['Al Salamah', 'Al Raas']
+}
+
+
+def _gazetteer_pattern(names):
+    names = sorted(set(names), key=len, reverse=True)
+    return re.compile(r'\b(' + '|'.join(re.escape(name) for name in names) + r')\b', re.IGNORECASE)
+
+
+_EMIRATE_ALIASES = {alias.lower(): emirate for emirate, aliases in EMIRATES.items() for alias in aliases}
+_EMIRATE_PATTERN = _gazetteer_pattern(alias for aliases in EMIRATES.values() for alias in aliases)
+_AREA_EMIRATES = {}
+for _emirate, _areas in AREAS.items():
+    for _area in _areas:
+        _AREA_EMIRATES.setdefault(_area.lower(), []).append(_emirate)
+_AREA_NAMES = {area.lower(): area for areas in AREAS.values() for area in areas}
+_AREA_PATTERN = _gazetteer_pattern(_AREA_NAMES.values())
+
+
+def normalize_phone(match) -> str:
+    """Every number as "+971 4 123 4567", "+971 50 123 4567" or "+971 800 2255"."""
+    if match.group('tollfree'):
+        digits = re.sub(r'[\s.-]', '', match.group('tollfree'))
+        return f"+971 {digits[:3]} {digits[3:]}"
+    number = re.sub(r'[\s.-]', '', match.group('number'))
+    return f"+971 {match.group('area')} {number[:3]} {number[3:]}"
+
+
+def _label_before(text: str, start: int) -> Optional[str]:
+    """'phone' or 'fax', whichever label comes last just before start, or None."""
+    context = text[max(0, start - LABEL_WINDOW):start]
+    phone = [m.end() for m in PHONE_LABEL.finditer(context)]
+    fax = [m.end() for m in FAX_LABEL.finditer(context)]
+    if not phone and not fax:
+        return None
+    return 'fax' if max(fax, default=-1) > max(phone, default=-1) else 'phone'
+
+
+def extract_phones(text: str) -> List[str]:
+    """UAE phone numbers in the text, normalized to "+971 4 123 4567" form, in order of appearance."""
+    phones = []
+    for match in PHONE_PATTERN.finditer(text):
+        label = _label_before(text, match.start())
+        if label == 'fax':
+            continue
+        if match.group('tollfree'):
+            plausible = match.group('tollfree_intl') or label == 'phone'
+        else:
+            plausible = match.group('intl') or match.group('paren') or match.group('sep') or label == 'phone'
+        if plausible:
+            phones.append(normalize_phone(match))
+    return list(dict.fromkeys(phones))
+
+
+def extract_emails(text: str) -> List[str]:
+    """E-mail addresses in the text, lower-cased, in order of appearance."""
+    return list(dict.fromkeys(match.group(0).lower() for match in EMAIL_PATTERN.finditer(text)))
+
+
+def _bare_host(domain: str) -> str:
+    domain = domain.lower().strip('.')
+    return domain[4:] if domain.startswith('www.') else domain
+
+
+def _site_root(domain: str) -> Optional[str]:
+    # Subdomains are kept as found (uae.thumbay.com); only "www." is dropped so both spellings agree
+    host = _bare_host(domain)
+    if not host or host in WEBMAIL_DOMAINS or is_directory(f"https://{host}"):
+        return None
+    return f"https://{host}"
+
+
+def extract_websites(text: str, source_url: str = '') -> List[str]:
+    """
+    Candidate official sites from URLs, bare domains and e-mail domains in the
+    text, as "https://host" roots.
+
+    The source's own host is left out: a news article or directory naming its
+    own site says nothing about the hospital's.
+    """
+    own_host = _bare_host(urlparse(source_url).hostname or '') if source_url else ''
+    domains = URL_PATTERN.findall(text) + EMAIL_PATTERN.findall(text)
+    roots = (_site_root(domain) for domain in domains if _bare_host(domain) != own_host)
+    return list(dict.fromkeys(root for root in roots if root))
+
+
+def extract_location(text: str) -> Optional[str]:
+    """
+    The emirate (and area) most mentioned in the text, as "Emirate: X, Area: Y".
+
+    Areas whose name exists in several emirates are attributed to the emirate
+    the text mentions most.
+    """
+    emirates = Counter(_EMIRATE_ALIASES[match.group(1).lower()] for match in _EMIRATE_PATTERN.finditer(text))
+    areas = Counter()
+    for match in _AREA_PATTERN.finditer(text):
+        area = _AREA_NAMES[match.group(1).lower()]
+        for emirate in _AREA_EMIRATES[area.lower()]:
+            areas[(emirate, area)] += 1 + emirates.get(emirate, 0)
+    if not emirates and not areas:
+        return None
+
+    if areas:
+        (emirate, area), _ = areas.most_common(1)[0]
+        if not emirates or emirates.get(emirate):
+            return f"Emirate: {emirate}, Area: {area}"
+    return f"Emirate: {emirates.most_common(1)[0][0]}"
+
+
+def _extract_location_values(text, source_url):
+    location = extract_location(text)
+    return [location] if location else []
+
+
+# Keyed by extract_hospital_data field name; 'email' has no field there yet
+PRE_EXTRACTORS = {
+    'phone': lambda text, source_url: extract_phones(text),
+    'url': extract_websites,
+    'location': _extract_location_values,
+    'email': lambda text, source_url: extract_emails(text)
+}
+
+
+def pre_extract(field_type: str, sources: List[dict]) -> List[dict]:
+    """
+    Run the local extractor of a field over its sources.
+
+    Returns:
+        list: chunk_results-shaped candidates, [{'value': ..., 'source_url': ...}]
+    """
+    extractor = PRE_EXTRACTORS[field_type]
+    candidates = []
+    for source in sources:
+        text = source.get('text', '')
+        if not isinstance(text, str):
+            continue
+        for value in extractor(text, source.get('url', '')):
+            candidates.append({'value': value, 'source_url': source.get('url', '')})
+    return candidates
+
+
+def is_decisive(candidates: List[dict], share: float = DECISIVE_SHARE,
+                min_sources: int = MIN_AGREEING_SOURCES) -> bool:
+    """
+    True when the candidates settle the field without an LLM: the top value is
+    found in at least min_sources distinct sources and in at least share of
+    the sources that produced any candidate.
+    """
+    if not candidates:
+        return False
+    sources_by_value: Dict[str, set] = {}
+    for candidate in candidates:
+        sources_by_value.setdefault(candidate['value'], set()).add(candidate['source_url'])
+    sources_with_values = set().union(*sources_by_value.values())
+    top = max(len(urls) for urls in sources_by_value.values())
+    return top >= min_sources and top / len(sources_with_values) >= share
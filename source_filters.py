@@ -0,0 +1,276 @@
+import re
+import math
+import hashlib
+import logging
+from typing import Dict, List, Tuple
+from urllib.parse import urlparse
+from token_accounting import count_tokens_batch
+from tools.url_registry import normalize_url
+
+logger = logging.getLogger(__name__)
+
+# Characters kept on each side of a category-relevant match
+WINDOW_CHARS = 300
+# Texts shorter than this are passed through untouched
+MIN_PRUNE_LENGTH = 2000
+# Kept from the top of a source without any match, so it still identifies the page
+HEAD_CHARS = 300
+SEPARATOR = " ... "
+
+UAE_PHONE = r'(?:\+|00)\s?971[\s-]?\(?0?\d{1,2}\)?[\s-]?\d{3}[\s-]?\d{3,4}|\b0\d{1,2}[\s-]?\d{3}[\s-]?\d{4}\b|\b800[\s-]?\d{3,7}\b'
+
+INSURERS = (
+    r'Daman|Thiqa|Enaya|AXA|GIG|Gulf Insurance|Allianz|Cigna|MetLife|Bupa|Aetna|Sukoon|Oman Insurance|'
+    r'Orient|ADNIC|Abu Dhabi National Insurance|Neuron|NextCare|Next Care|NAS|MedNet|Al Buhaira|'
+    r'Dubai Insurance|Al Madallah|Almadallah|SAICO|Takaful|Watania|Now Health|Henner|Lifeline|Inayah|'
+    r'FMC|Al Dhafra|Union Insurance|Noor Takaful|Salama|Emirates Insurance|RSA|Zurich|QIC|Tokio Marine'
+)
+
+EMIRATES = r'Abu Dhabi|Dubai|Sharjah|Ajman|Umm Al Quwain|Ras Al Khaimah|Fujairah|Al Ain|Khor Fakkan|Kalba'
+
+CATEGORY_PATTERNS = {
+    'phone': UAE_PHONE + r'|\b(?:tel|telephone|phone|call us|contact us|toll[- ]free|hotline)\b',
+    'revenue': r'revenue|income|turnover|profit|EBITDA|\bAED\b|\bUSD\b|\bDhs?\b|US\$|\b(?:million|billion|mn|bn)\b',
+    'insurance': INSURERS + r'|insurance|insurer|\bTPA\b|coverage|network partners|direct billing',
+    'ceo': r'\bCEO\b|Chief Executive|Managing Director|General Manager|Chairman|Founder|President|Hospital Director',
+    'management': r'\bC[EFOM]O\b|Chief \w+ Officer|Managing Director|Medical Director|Director|Chairman|Board|Executive|Leadership|Management',
+    'doctors': r'\bdoctors?\b|physicians?|consultants?|specialists?|surgeons?|\bDr\.?\s|medical staff|clinicians',
+    'specialties': r'departments?|specialt(?:y|ies)|specialit(?:y|ies)|clinics?\b|cent(?:re|er)s? of excellence|'
+                   r'cardiology|orthop(?:a)?edic|p(?:a)?ediatric|oncology|neurology|dermatology|gyn(?:a)?ecology|'
+                   r'obstetrics|urology|radiology|ENT\b|ophthalmology|dental|emergency',
+    'location': EMIRATES + r'|address|street|road|\bP\.?\s?O\.?\s?Box\b|building|tower|floor|district|area|emirate|location',
+    'website': r'https?://|www\.|\.ae\b|\.com\b|official (?:web)?site'
+}
+
+_COMPILED = {category: re.compile(pattern, re.IGNORECASE) for category, pattern in CATEGORY_PATTERNS.items()}
+
+
+def relevant_windows(text: str, pattern, window: int = WINDOW_CHARS) -> List[Tuple[int, int]]:
+    """Merged (start, end) spans of window characters around every match of pattern."""
+    spans = []
+    for match in pattern.finditer(text):
+        start = max(0, match.start() - window)
+        end = min(len(text), match.end() + window)
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], max(spans[-1][1], end))
+        else:
+            spans.append((start, end))
+    return spans
+
+
+def prune_text(text: str, category: str, window: int = WINDOW_CHARS) -> str:
+    """
+    Keep only the passages of text that are relevant to the category.
+
+    Windows of window characters around each match are merged and joined with
+    " ... ". A text without any match is reduced to its first HEAD_CHARS
+    characters. Short texts and unknown categories are returned unchanged.
+    """
+    pattern = _COMPILED.get(category)
+    if pattern is None or not isinstance(text, str) or len(text) < MIN_PRUNE_LENGTH:
+        return text
+
+    spans = relevant_windows(text, pattern, window)
+    if not spans:
+        return text[:HEAD_CHARS]
+    return SEPARATOR.join(text[start:end].strip() for start, end in spans)
+
+
+def prune_collected_data(collected_data: Dict[str, list], window: int = WINDOW_CHARS):
+    """
+    Prune every source of the extractor's collected_data to its relevant passages.
+
+    Args:
+        collected_data (dict): category -> list of {'text', 'url', 'metadata'}
+        window (int): Characters kept on each side of a match
+
+    Returns:
+        tuple: (pruned collected_data, stats) where stats maps each category to
+        its token counts before and after pruning. The input is not modified.
+    """
+    pruned = {}
+    before_texts, after_texts, owners = [], [], []
+    for category, sources in collected_data.items():
+        pruned[category] = []
+        for source in sources:
+            text = source.get('text', '') if isinstance(source, dict) else source
+            new_text = prune_text(text, category, window)
+            pruned[category].append(dict(source, text=new_text) if isinstance(source, dict) else new_text)
+            before_texts.append(text if isinstance(text, str) else str(text))
+            after_texts.append(new_text if isinstance(new_text, str) else str(new_text))
+            owners.append(category)
+
+    before = count_tokens_batch(before_texts)
+    after = count_tokens_batch(after_texts)
+    stats = {}
+    for category, tokens_before, tokens_after in zip(owners, before, after):
+        entry = stats.setdefault(category, {'sources': 0, 'tokens_before': 0, 'tokens_after': 0})
+        entry['sources'] += 1
+        entry['tokens_before'] += tokens_before
+        entry['tokens_after'] += tokens_after
+    return pruned, stats
+
+
+def summarize_stats(stats: Dict[str, dict]) -> str:
+    lines = []
+    for category, entry in stats.items():
+        lines.append(f"{category}: {entry['tokens_before']} -> {entry['tokens_after']} tokens "
+                     f"({entry['sources']} sources)")
+    total_before = sum(entry['tokens_before'] for entry in stats.values())
+    total_after = sum(entry['tokens_after'] for entry in stats.values())
+    lines.append(f"total: {total_before} -> {total_after} tokens, saved {total_before - total_after}")
+    return "\n".join(lines)
+
+
+# Sources whose SimHash fingerprints differ in at most this many bits are near-duplicates
+SIMHASH_BITS = 64
+SIMHASH_DISTANCE = 6
+SHINGLE_WORDS = 3
+# Below this many words a fingerprint is unreliable, so only exact copies are collapsed
+MIN_SIMHASH_WORDS = 30
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def simhash(text: str, shingle_words: int = SHINGLE_WORDS) -> int:
+    """64-bit SimHash of the text's word shingles."""
+    words = _WORD.findall(text.lower())
+    if len(words) < shingle_words:
+        words = words + [''] * (shingle_words - len(words))
+    values = [
+        int.from_bytes(hashlib.blake2b(' '.join(words[i:i + shingle_words]).encode('utf-8'), digest_size=8).digest(), 'big')
+        for i in range(len(words) - shingle_words + 1)
+    ]
+    # A bit is set when it is set in more than half of the shingle hashes
+    half = len(values) / 2
+    fingerprint = 0
+    for bit in range(SIMHASH_BITS):
+        if sum(value >> bit & 1 for value in values) > half:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def collapse_near_duplicates(sources: List[dict], max_distance: int = SIMHASH_DISTANCE) -> List[dict]:
+    """
+    Collapse syndicated copies of the same text into one source.
+
+    The longest text of each group of near-duplicates is kept; the URLs of the
+    other copies are listed under 'duplicate_urls' so attribution is preserved.
+    Sources are otherwise returned in their original order.
+    """
+    entries = []
+    for source in sources:
+        text = source.get('text', '')
+        text = text if isinstance(text, str) else str(text)
+        normalized = ' '.join(_WORD.findall(text.lower()))
+        fingerprint = simhash(text) if len(normalized.split()) >= MIN_SIMHASH_WORDS else None
+        entries.append((source, normalized, fingerprint))
+
+    groups = []
+    for source, normalized, fingerprint in entries:
+        for group in groups:
+            _, group_normalized, group_fingerprint = group[0]
+            if normalized == group_normalized or (
+                    fingerprint is not None and group_fingerprint is not None
+                    and bin(fingerprint ^ group_fingerprint).count('1') <= max_distance):
+                group.append((source, normalized, fingerprint))
+                break
+        else:
+            groups.append([(source, normalized, fingerprint)])
+
+    collapsed = []
+    for group in groups:
+        members = [source for source, _, _ in group]
+        keep = max(members, key=lambda source: len(str(source.get('text', ''))))
+        duplicate_urls = list(keep.get('duplicate_urls', []))
+        for source in members:
+            if source is not keep:
+                duplicate_urls.extend(url for url in [source.get('url')] + list(source.get('duplicate_urls', []))
+                                      if url and url != keep.get('url') and url not in duplicate_urls)
+        collapsed.append(dict(keep, duplicate_urls=duplicate_urls) if duplicate_urls else keep)
+    return collapsed
+
+
+# A line is treated as boilerplate when it is on at least this many pages of one
+# domain and on at least this share of the domain's pages
+BOILERPLATE_MIN_PAGES = 3
+BOILERPLATE_MIN_SHARE = 0.5
+
+
+def remove_boilerplate(collected_data: Dict[str, list], min_pages: int = BOILERPLATE_MIN_PAGES,
+                       min_share: float = BOILERPLATE_MIN_SHARE):
+    """
+    Drop header, footer, navigation and cookie-banner lines repeated across pages of a domain.
+
+    Lines are counted per distinct page (the same URL stored under several
+    categories counts once). A line on at least min_pages pages, and on at
+    least min_share of the domain's pages, is boilerplate. Each category keeps
+    it on its first page that has it, because every field agent only reads its
+    own category: a phone number that only lives in the shared footer must
+    still reach the phone agent and the location agent.
+
+    Returns:
+        tuple: (filtered collected_data, stats) with the lines and tokens removed.
+        The input is not modified.
+    """
+    pages = {}
+    for sources in collected_data.values():
+        for source in sources:
+            if not isinstance(source, dict) or not isinstance(source.get('text'), str) or not source.get('url'):
+                continue
+            url = normalize_url(source['url'])
+            domain = (urlparse(url).hostname or '').lower()
+            pages.setdefault(domain, {}).setdefault(url, source['text'])
+
+    # Boilerplate lines per domain
+    repeated_lines = {}
+    for domain, domain_pages in pages.items():
+        threshold = max(min_pages, math.ceil(min_share * len(domain_pages)))
+        if len(domain_pages) < threshold:
+            continue
+        page_count = {}
+        for text in domain_pages.values():
+            for line in set(text.splitlines()):
+                page_count[line] = page_count.get(line, 0) + 1
+        lines = {line for line, count in page_count.items() if count >= threshold}
+        if lines:
+            repeated_lines[domain] = lines
+
+    filtered = {}
+    seen_lines = {}
+    before_texts, after_texts = [], []
+    lines_removed = 0
+    for category, sources in collected_data.items():
+        filtered[category] = []
+        for source in sources:
+            if not isinstance(source, dict) or not isinstance(source.get('text'), str) or not source.get('url'):
+                filtered[category].append(source)
+                continue
+            domain = (urlparse(normalize_url(source['url'])).hostname or '').lower()
+            repeated = repeated_lines.get(domain)
+            if not repeated:
+                filtered[category].append(source)
+                continue
+            # Boilerplate lines this category has already kept once
+            seen = seen_lines.setdefault((category, domain), set())
+            lines = source['text'].splitlines()
+            kept = []
+            for line in lines:
+                if line in repeated:
+                    if line in seen:
+                        continue
+                    seen.add(line)
+                kept.append(line)
+            lines_removed += len(lines) - len(kept)
+            before_texts.append(source['text'])
+            after_texts.append('\n'.join(kept))
+            filtered[category].append(dict(source, text=after_texts[-1]))
+
+    tokens_before = sum(count_tokens_batch(before_texts)) if before_texts else 0
+    tokens_after = sum(count_tokens_batch(after_texts)) if after_texts else 0
+    stats = {
+        'domains': len(repeated_lines),
+        'lines_removed': lines_removed,
+        'tokens_removed': tokens_before - tokens_after
+    }
+    return filtered, stats
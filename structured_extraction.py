@@ -0,0 +1,121 @@
+import os
+import json
+import threading
+from typing import Dict, List
+from tools.llm_cache import cached_chat_completion, completion_content, is_complete_completion
+
+try:
+    from openai import OpenAI
+except ImportError:
+    OpenAI = None
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+SYSTEM_PROMPT = (
+    "You extract facts about UAE hospitals from scraped web sources. "
+    "Only report values that appear in the sources, each with the URL of the source it came from."
+)
+
+# Strict schema of one chunk's answer; the prompts in build_chunk_prompt ask for the same shape
+CHUNK_RESULTS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "chunk_results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "value": {"type": "string"},
+                    "source_url": {"type": "string"}
+                },
+                "required": ["value", "source_url"],
+                "additionalProperties": False
+            }
+        }
+    },
+    "required": ["chunk_results"],
+    "additionalProperties": False
+}
+
+_clients: Dict[str, "OpenAI"] = {}
+_clients_lock = threading.Lock()
+
+
+def structured_model() -> str:
+    """Model used by the structured engine, from OPENAI_MODEL_NAME."""
+    return os.environ.get("OPENAI_MODEL_NAME") or DEFAULT_MODEL
+
+
+def get_client(api_key: str):
+    """Return a shared OpenAI client for the API key."""
+    if OpenAI is None:
+        raise ImportError("The structured engine needs the openai package. Install it with 'pip install openai'")
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = OpenAI(api_key=api_key)
+            _clients[api_key] = client
+        return client
+
+
+def response_format(name: str, schema: dict) -> dict:
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "strict": True, "schema": schema}
+    }
+
+
+def is_json_completion(data: dict) -> bool:
+    """Cache only complete answers whose content parses as JSON."""
+    if not is_complete_completion(data):
+        return False
+    try:
+        json.loads(completion_content(data))
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def complete_json(client, prompt: str, schema: dict, name: str, model: str = None) -> dict:
+    """
+    Send one prompt to the chat API with a strict JSON schema and return the parsed object.
+
+    Raises ValueError if the model refuses or the output does not parse.
+    """
+    response = cached_chat_completion(
+        client,
+        model=model or structured_model(),
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        response_format=response_format(name, schema),
+        temperature=0,
+        validate=is_json_completion
+    )
+    message = response.choices[0].message
+    if getattr(message, "refusal", None):
+        raise ValueError(f"Model refused the request: {message.refusal}")
+    return json.loads(message.content)
+
+
+def extract_chunk(client, prompt: str, model: str = None) -> List[dict]:
+    """Run one chunk prompt and return its chunk_results list."""
+    return complete_json(client, prompt, CHUNK_RESULTS_SCHEMA, "chunk_results", model)["chunk_results"]
+
+
+# Field keys returned by a multi-field call, matching extract_hospital_data's field names
+MULTI_FIELDS = ['revenue', 'specialties', 'doctors', 'ceo', 'url', 'management', 'insurance', 'phone', 'location']
+
+MULTI_FIELD_SCHEMA = {
+    "type": "object",
+    "properties": {field: CHUNK_RESULTS_SCHEMA["properties"]["chunk_results"] for field in MULTI_FIELDS},
+    "required": MULTI_FIELDS,
+    "additionalProperties": False
+}
+
+
+def extract_chunk_all_fields(client, prompt: str, model: str = None) -> Dict[str, List[dict]]:
+    """Run one multi-field chunk prompt and return {field: [{'value', 'source_url'}, ...]}."""
+    result = complete_json(client, prompt, MULTI_FIELD_SCHEMA, "hospital_fields", model)
+    return {field: result.get(field, []) for field in MULTI_FIELDS}
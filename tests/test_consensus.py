@@ -0,0 +1,54 @@
+import json
+
+from consensus import resolve_consensus, agreement, NO_DATA
+
+
+def field_result(counts, total=True):
+    """Aggregated field output as manually_aggregate_results writes it, from {value: count}."""
+    values = [{'value': value, 'count': count, 'source_urls': [f"https://source-{i}.ae" for i in range(count)]}
+              for value, count in sorted(counts.items(), key=lambda item: -item[1])]
+    result = {'most_common': values[0], 'all_values': values}
+    if total:
+        result['total_count'] = sum(counts.values())
+    return json.dumps(result)
+
+
+def resolve(field_result, **kwargs):
+    final_data, contested = resolve_consensus({'phone': field_result}, **kwargs)
+    return final_data.get('PHONE'), 'phone' in contested
+
+
+def test_agreeing_sources_resolve_locally():
+    entry, contested = resolve(field_result({"+971 4 123 4567": 3, "+971 4 123 4568": 1}))
+    assert not contested
+    assert entry['value'] == "+971 4 123 4567"
+    assert entry['confidence'] == "High"
+    assert entry['alternatives'][0]['value'] == "+971 4 123 4568"
+
+
+def test_single_source_is_not_consensus():
+    assert resolve(field_result({"+971 4 123 4567": 1})) == (None, True)
+    entry, contested = resolve(field_result({"+971 4 123 4567": 1}), min_count=1)
+    assert not contested and entry['confidence'] == "Low"
+
+
+def test_split_values_are_contested():
+    assert resolve(field_result({"+971 4 123 4567": 2, "+971 4 123 4568": 2})) == (None, True)
+
+
+def test_result_without_total_count_is_contested():
+    result = field_result({"+971 4 123 4567": 3}, total=False)
+    assert agreement(json.loads(result)) == 0.0
+    assert resolve(result) == (None, True)
+
+
+def test_no_data_resolves_without_the_coordinator():
+    entry, contested = resolve(json.dumps({'most_common': {'value': NO_DATA, 'count': 0}, 'all_values': []}))
+    assert not contested
+    assert entry['value'] == NO_DATA
+
+
+def test_unparseable_and_missing_fields_are_contested():
+    final_data, contested = resolve_consensus({'phone': "Agent stopped due to iteration limit."})
+    assert final_data == {}
+    assert 'phone' in contested and 'ceo' in contested
@@ -0,0 +1,100 @@
+import requests
+import pytest
+
+from tools.domain_health import DomainHealth, classify_error
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"HTTP {status}", response=response)
+
+
+def trip(health, domain="https://example.ae", failures=3):
+    for i in range(failures):
+        health.record_failure(f"{domain}/page-{i}", "timeout")
+
+
+@pytest.fixture
+def health():
+    # No cool-down, so a tripped domain is immediately half-open
+    return DomainHealth(failure_threshold=3, cooldown=0)
+
+
+def test_circuit_opens_after_consecutive_domain_failures():
+    health = DomainHealth(failure_threshold=3, cooldown=600)
+    trip(health, failures=2)
+    assert health.check("https://example.ae/about") is None
+    trip(health, failures=1)
+    assert "cooling down" in health.check("https://example.ae/about")
+    assert "example.ae" in health.stats()['open_domains']
+
+
+def test_half_open_allows_a_single_trial(health):
+    trip(health)
+    assert health.check("https://example.ae/a") is None
+    assert "cooling down" in health.check("https://example.ae/b")
+
+
+def test_successful_trial_closes_the_circuit(health):
+    trip(health)
+    assert health.check("https://example.ae/a") is None
+    health.record_success("https://example.ae/a")
+    assert health.check("https://example.ae/b") is None
+    assert health.check("https://example.ae/c") is None
+    assert health.stats()['open_domains'] == {}
+
+
+def test_page_level_failure_on_trial_closes_the_circuit(health):
+    trip(health)
+    assert health.check("https://example.ae/missing") is None
+    health.record_failure("https://example.ae/missing", "HTTP 404", domain_level=False)
+    assert health.check("https://example.ae/b") is None
+    assert health.check("https://example.ae/c") is None
+
+
+def test_domain_level_failure_on_trial_reopens_the_circuit():
+    health = DomainHealth(failure_threshold=3, cooldown=0)
+    trip(health)
+    assert health.check("https://example.ae/a") is None
+    health.cooldown = 600
+    health.record_failure("https://example.ae/a", "HTTP 503")
+    assert "cooling down" in health.check("https://example.ae/b")
+
+
+def test_failed_url_is_skipped_without_affecting_its_domain(health):
+    health.record_failure("https://example.ae/missing", "HTTP 404", domain_level=False)
+    assert "recently failed" in health.check("https://www.example.ae/missing/")
+    assert health.check("https://example.ae/other") is None
+
+
+def test_other_domains_are_unaffected(health):
+    trip(health)
+    assert health.check("https://other.ae/") is None
+
+
+@pytest.mark.parametrize("error, expected", [
+    (http_error(403), ("HTTP 403", True)),
+    (http_error(429), ("HTTP 429", True)),
+    (http_error(404), ("HTTP 404", False)),
+    (requests.Timeout(), ("timeout", True)),
+    (requests.ConnectionError(), ("connection error", True)),
+    (ValueError("bad markup"), ("ValueError", False)),
+])
+def test_classify_error(error, expected):
+    assert classify_error(error) == expected
+
+
+def test_is_open_does_not_consume_the_trial(health):
+    assert not health.is_open("https://example.ae/")
+    trip(health)
+    assert not health.is_open("https://example.ae/")
+    assert health.check("https://example.ae/a") is None
+    assert health.is_open("https://example.ae/")
+
+
+def test_is_open_while_cooling_down():
+    health = DomainHealth(failure_threshold=3, cooldown=600)
+    trip(health)
+    assert health.is_open("https://www.example.ae/")
+    assert not health.is_open("https://other.ae/")
@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import pytest
+
+from tools import llm_cache
+from tools.ttl_cache import TTLCache
+
+
+class FakeCrew:
+    def __init__(self, outputs, temperature=0.0, tools=()):
+        llm = SimpleNamespace(model="gpt-4o-mini", temperature=temperature)
+        self.agents = [SimpleNamespace(role="Extractor", goal="Extract", backstory="Analyst", llm=llm,
+                                       tools=list(tools), max_iter=15)]
+        self.tasks = [SimpleNamespace(description="Find the phone number", expected_output="JSON", tools=[])]
+        self.outputs = list(outputs)
+        self.kickoffs = 0
+
+    def kickoff(self):
+        self.kickoffs += 1
+        return self.outputs.pop(0)
+
+
+@pytest.fixture(autouse=True)
+def memory_cache(monkeypatch):
+    monkeypatch.setattr(llm_cache, 'llm_cache', TTLCache('llm_test', maxsize=16, ttl=60))
+
+
+def test_json_output_is_cached():
+    crew = FakeCrew(['```json\n{"value": "+971 4 123 4567"}\n```'])
+    first = llm_cache.cached_kickoff(crew)
+    second = llm_cache.cached_kickoff(crew)
+    assert str(first) == str(second)
+    assert crew.kickoffs == 1
+
+
+def test_failure_text_is_not_cached():
+    crew = FakeCrew(["Agent stopped due to iteration limit or time limit.", '[{"value": "x"}]'])
+    assert str(llm_cache.cached_kickoff(crew)).startswith("Agent stopped")
+    assert str(llm_cache.cached_kickoff(crew)) == '[{"value": "x"}]'
+    assert crew.kickoffs == 2
+
+
+def test_key_covers_llm_settings_and_tools():
+    base = llm_cache.crew_cache_key(FakeCrew([]))
+    assert llm_cache.crew_cache_key(FakeCrew([], temperature=0.7)) != base
+    assert llm_cache.crew_cache_key(FakeCrew([], tools=[SimpleNamespace(name="search")])) != base
+    assert llm_cache.crew_cache_key(FakeCrew([])) == base
+
+
+def completion(content, finish_reason="stop", refusal=None):
+    return {'choices': [{'finish_reason': finish_reason,
+                         'message': {'role': "assistant", 'content': content, 'refusal': refusal}}]}
+
+
+@pytest.mark.parametrize("data, expected", [
+    (completion("+971 4 123 4567"), True),
+    (completion('{"value": "x', finish_reason="length"), False),
+    (completion(None, refusal="I can't help with that."), False),
+    (completion("  "), False),
+    ({'choices': []}, False),
+])
+def test_only_complete_chat_completions_are_valid(data, expected):
+    assert llm_cache.is_complete_completion(data) is expected
+
+
+def test_truncated_completion_is_not_cached():
+    outputs = [completion('{"value": "x', finish_reason="length"), completion('{"value": "x"}')]
+    compute = lambda: outputs.pop(0)
+    validate = llm_cache.is_complete_completion
+    assert llm_cache.cached_call(('chat.completions', {}), compute, validate=validate)['choices'][0]['finish_reason'] == "length"
+    assert llm_cache.cached_call(('chat.completions', {}), compute, validate=validate) == completion('{"value": "x"}')
+    assert llm_cache.cached_call(('chat.completions', {}), compute, validate=validate) == completion('{"value": "x"}')
@@ -0,0 +1,58 @@
+from pre_extractors import extract_phones, extract_emails, extract_websites, extract_location, is_decisive
+
+
+def test_phone_formats_normalize_the_same_way():
+    text = "Call +971 4 123 4567 or 04-123-4567, mobile 050 765 4321, toll free 800 2255"
+    assert extract_phones(text) == ["+971 4 123 4567", "+971 50 765 4321", "+971 800 2255"]
+
+
+def test_parenthesised_area_code_and_600_grouping():
+    assert extract_phones("Tel: (04) 377 7777") == ["+971 4 377 7777"]
+    assert extract_phones("Call 600 5 67890") == ["+971 600 567890"]
+
+
+def test_unformatted_numbers_need_a_phone_label():
+    assert extract_phones("Licence ID 041234567") == []
+    assert extract_phones("Tel: 041234567") == ["+971 4 123 4567"]
+    assert extract_phones("over 800 250 patients") == []
+
+
+def test_fax_numbers_are_skipped():
+    text = "Tel: +971 4 123 4567 Fax: +971 4 123 4568"
+    assert extract_phones(text) == ["+971 4 123 4567"]
+
+
+def test_emails():
+    assert extract_emails("Write to Info@H.ae or info@h.ae") == ["info@h.ae"]
+
+
+def test_websites_keep_subdomains():
+    assert extract_websites("Visit uae.thumbay.com") == ["https://uae.thumbay.com"]
+    assert extract_websites("Visit www.h.ae") == ["https://h.ae"]
+
+
+def test_websites_leave_out_the_source_host_and_directories():
+    text = "Read more on gulfnews.com. The hospital site is www.h.ae, also on facebook.com/h"
+    assert extract_websites(text, "https://gulfnews.com/uae/health/story") == ["https://h.ae"]
+
+
+def test_location():
+    assert extract_location("Located in Al Barsha, Dubai") == "Emirate: Dubai, Area: Al Barsha"
+    assert extract_location("Nothing here") is None
+
+
+def candidates(*pairs):
+    return [{'value': value, 'source_url': url} for value, url in pairs]
+
+
+def test_single_source_is_not_decisive():
+    assert not is_decisive(candidates(("+971 4 123 4567", "https://a.ae")))
+
+
+def test_agreeing_sources_are_decisive():
+    assert is_decisive(candidates(("+971 4 123 4567", "https://a.ae"), ("+971 4 123 4567", "https://b.ae")))
+
+
+def test_conflicting_sources_are_not_decisive():
+    assert not is_decisive(candidates(("+971 4 123 4567", "https://a.ae"), ("+971 4 123 4567", "https://b.ae"),
+                                      ("+971 2 555 0000", "https://c.ae"), ("+971 2 555 0000", "https://d.ae")))
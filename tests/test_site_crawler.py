@@ -0,0 +1,31 @@
+from tools.site_crawler import find_official_site, name_tokens
+
+
+def test_name_tokens_drop_generic_words_and_places():
+    assert name_tokens("American Hospital Dubai") == ['american']
+    assert name_tokens("Mediclinic City Hospital") == ['mediclinic']
+
+
+def test_host_matching_the_name_wins_over_earlier_results():
+    results = [
+        ("https://gulfnews.com/uae/health/mediclinic-expands", "Mediclinic expands - Gulf News"),
+        ("https://www.mediclinic.ae/en/city-hospital", "City Hospital"),
+    ]
+    assert find_official_site(results, "Mediclinic City Hospital") == "https://www.mediclinic.ae"
+
+
+def test_title_must_be_the_name_not_a_headline():
+    results = [
+        ("https://gulfnews.com/uae/health/ahd", "American Hospital Dubai opens new wing - Gulf News"),
+        ("https://www.ahdubai.com/", "American Hospital Dubai | Home"),
+    ]
+    assert find_official_site(results, "American Hospital Dubai") == "https://www.ahdubai.com"
+
+
+def test_no_match_skips_the_crawl():
+    results = [
+        ("https://www.facebook.com/americanhospitaldubai", "American Hospital Dubai"),
+        ("https://gulfnews.com/uae/health/ahd", "American Hospital Dubai opens new wing - Gulf News"),
+        ("https://www.ahdubai.com/report.pdf", "American Hospital Dubai"),
+    ]
+    assert find_official_site(results, "American Hospital Dubai") is None
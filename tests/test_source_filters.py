@@ -0,0 +1,58 @@
+from source_filters import remove_boilerplate
+
+FOOTER = ["Home | About | Contact", "Call us: +971 4 123 4567", "Dubai Healthcare City, Dubai, UAE",
+          "We use cookies to improve your experience"]
+
+
+def page(path, *lines):
+    return {'url': f"https://www.h.ae{path}", 'text': "\n".join(list(lines) + FOOTER)}
+
+
+def collected():
+    return {
+        'specialties': [page("/departments", "Cardiology", "Orthopaedics"),
+                        page("/centres", "Oncology", "Cardiology")],
+        'doctors': [page("/our-doctors", "Dr A. Khan, Cardiology")],
+        'phone': [page("/contact", "Contact", "Email info@h.ae")],
+        'location': [page("/about", "About us")],
+        'ceo': [{'url': "https://news.example.com/story", 'text': "\n".join(["CEO named"] + FOOTER)}],
+    }
+
+
+def test_shared_footer_is_kept_once_per_category():
+    filtered, stats = remove_boilerplate(collected())
+
+    for category in ('specialties', 'phone', 'location', 'doctors'):
+        text = "\n".join(source['text'] for source in filtered[category])
+        for line in FOOTER:
+            assert text.count(line) == 1, (category, line)
+
+    # The second specialties page drops the footer its category already has
+    assert filtered['specialties'][1]['text'].splitlines() == ["Oncology", "Cardiology"]
+    assert stats['domains'] == 1
+    assert stats['lines_removed'] == len(FOOTER)
+    assert stats['tokens_removed'] > 0
+
+
+def test_line_on_a_few_pages_is_not_boilerplate():
+    filtered, _ = remove_boilerplate(collected())
+    assert "Cardiology" in filtered['specialties'][0]['text'].splitlines()
+    assert "Cardiology" in filtered['specialties'][1]['text'].splitlines()
+
+
+def test_other_domains_and_small_sites_are_untouched():
+    data = collected()
+    filtered, _ = remove_boilerplate(data)
+    assert filtered['ceo'] == data['ceo']
+
+    small = {'phone': [page("/contact")], 'location': [page("/about")]}
+    filtered, stats = remove_boilerplate(small)
+    assert filtered == small
+    assert stats['lines_removed'] == 0
+
+
+def test_input_is_not_modified():
+    data = collected()
+    before = {category: [dict(source) for source in sources] for category, sources in data.items()}
+    remove_boilerplate(data)
+    assert data == before
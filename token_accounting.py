@@ -0,0 +1,74 @@
+import math
+import threading
+from functools import lru_cache
+from typing import Dict, List
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+DEFAULT_MODEL = "gpt-4"
+
+
+@lru_cache(maxsize=None)
+def get_encoder(model: str = DEFAULT_MODEL):
+    """Return a cached tiktoken encoder for the model, or None if tiktoken is unavailable."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough word-based estimate used when no encoder is available."""
+    return int(math.ceil(len(text.split()) * 1.5))
+
+
+def count_tokens(text: str, model: str = DEFAULT_MODEL) -> int:
+    """Count the number of tokens in a text string."""
+    return count_tokens_batch([text], model)[0]
+
+
+def count_tokens_batch(texts: List[str], model: str = DEFAULT_MODEL) -> List[int]:
+    """Count tokens for many strings in one encoder call. Always returns ints."""
+    texts = [text if isinstance(text, str) else str(text) for text in texts]
+    encoder = get_encoder(model)
+    if encoder is not None:
+        try:
+            # Special-token markers scraped from pages are counted as plain text
+            return [len(tokens) for tokens in encoder.encode_batch(texts, disallowed_special=())]
+        except Exception:
+            pass
+    return [estimate_tokens(text) for text in texts]
+
+
+class TokenLedger:
+    """
+    Thread-safe per-run record of tokens sent to the LLM, grouped by field.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fields: Dict[str, Dict[str, int]] = {}
+
+    def record(self, field: str, tokens: int, kind: str = "input"):
+        with self._lock:
+            entry = self._fields.setdefault(field, {})
+            entry[kind] = entry.get(kind, 0) + int(tokens)
+
+    def by_field(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {field: dict(counts) for field, counts in self._fields.items()}
+
+    def total(self, kind: str = "input") -> int:
+        with self._lock:
+            return sum(counts.get(kind, 0) for counts in self._fields.values())
+
+    def summary(self) -> str:
+        lines = [f"{field}: {counts}" for field, counts in self.by_field().items()]
+        lines.append(f"total input tokens: {self.total()}")
+        return "\n".join(lines)
@@ -1,4 +1,5 @@
 from openai import OpenAI
+from tools.llm_cache import cached_chat_completion
 
 import json
 
@@ -103,7 +104,7 @@ def search_hospital_parent_group(hospital_name: str, api_key: str):
     print(f"Searching for parent group of {hospital_name}...")
     
     # Use OpenAI's web search functionality
-    completion = client.chat.completions.create(
+    completion = cached_chat_completion(client,
         model="gpt-4o-mini-search-preview",
         web_search_options={},
         messages=[
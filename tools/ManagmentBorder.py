@@ -1,4 +1,5 @@
 from openai import OpenAI
+from tools.llm_cache import cached_chat_completion
 import json
 
 def search_for_hospital_ceo(hospital_name: str, api_key: str):
@@ -100,7 +101,7 @@ def search_for_hospital_ceo(hospital_name: str, api_key: str):
     print(f"Prompt : {search_query}")
     
     # Use OpenAI's web search functionality
-    completion = client.chat.completions.create(
+    completion = cached_chat_completion(client,
         model="gpt-4o-mini-search-preview",
         web_search_options={},
         messages=[
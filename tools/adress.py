@@ -1,4 +1,5 @@
 from openai import OpenAI
+from tools.llm_cache import cached_chat_completion
 
 def search_for_address(query: str, api_key: str):
     client = OpenAI(api_key=api_key)
@@ -14,7 +15,7 @@ def search_for_address(query: str, api_key: str):
     '''
     
     print(f"Prompt : {search_query}")
-    completion = client.chat.completions.create(
+    completion = cached_chat_completion(client,
         model="gpt-4o-mini-search-preview",
         web_search_options={},
         messages=[
@@ -0,0 +1,145 @@
+import os
+import re
+import json
+import time
+import threading
+import logging
+from urllib.parse import urlparse
+from tools.ttl_cache import CACHE_DIR
+from tools.http_pool import get_limited
+
+logger = logging.getLogger(__name__)
+
+COOKIE_DIR = os.path.join(CACHE_DIR, "cloudscraper")
+# Cookies without an expiry (session cookies) are kept this long on disk
+SESSION_COOKIE_TTL = 3600
+
+_scrapers = {}
+_domain_locks = {}
+# Domains whose scraper has passed Cloudflare; their fetches run concurrently
+_cleared = set()
+_lock = threading.Lock()
+
+
+def _domain(url):
+    host = (urlparse(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def _cookie_path(domain):
+    return os.path.join(COOKIE_DIR, re.sub(r'[^a-z0-9.-]', '_', domain) + ".json")
+
+
+def _load_state(scraper, domain):
+    """Restore unexpired cookies and the User-Agent they were issued to."""
+    try:
+        with open(_cookie_path(domain), encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return 0
+
+    now = time.time()
+    cookies = [c for c in state.get('cookies', []) if c.get('expires') and c['expires'] > now]
+    if not cookies:
+        return 0
+    # cf_clearance is only honoured for the User-Agent that solved the challenge
+    if state.get('user_agent'):
+        scraper.headers['User-Agent'] = state['user_agent']
+    for cookie in cookies:
+        scraper.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain', ''),
+                            path=cookie.get('path', '/'), expires=cookie['expires'],
+                            secure=cookie.get('secure', False))
+    return len(cookies)
+
+
+def _save_state(scraper, domain):
+    now = time.time()
+    cookies = [{
+        'name': cookie.name,
+        'value': cookie.value,
+        'domain': cookie.domain,
+        'path': cookie.path,
+        'secure': cookie.secure,
+        'expires': cookie.expires or now + SESSION_COOKIE_TTL
+    } for cookie in scraper.cookies]
+    if not cookies:
+        return
+    try:
+        os.makedirs(COOKIE_DIR, exist_ok=True)
+        path = _cookie_path(domain)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding='utf-8') as f:
+            json.dump({'user_agent': scraper.headers.get('User-Agent'), 'cookies': cookies, 'saved_at': now}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not persist CloudScraper cookies for {domain}: {str(e)}")
+
+
+def get_scraper(url):
+    """
+    Return (scraper, lock) for the URL's domain.
+
+    One long-lived CloudScraper per domain keeps the Cloudflare clearance it
+    earned, and cookies saved by earlier runs are restored on creation. The
+    lock serialises requests until the domain is cleared, so that a challenge
+    is solved only once.
+    """
+    domain = _domain(url)
+    with _lock:
+        scraper = _scrapers.get(domain)
+        if scraper is None:
+            import cloudscraper
+            scraper = cloudscraper.create_scraper(delay=10, browser='chrome')
+            restored = _load_state(scraper, domain)
+            if restored:
+                logger.info(f"Restored {restored} CloudScraper cookies for {domain}")
+                if 'cf_clearance' in scraper.cookies:
+                    _cleared.add(domain)
+            _scrapers[domain] = scraper
+            _domain_locks[domain] = threading.Lock()
+        return scraper, _domain_locks[domain]
+
+
+def fetch(url, timeout=30, **kwargs):
+    """
+    GET a URL through the domain's pooled CloudScraper and persist its cookies.
+
+    Until the domain has been fetched successfully, requests to it go one at a
+    time so that only the first one solves the challenge; after that they run
+    concurrently. A 403 or 503 withdraws the clearance again.
+
+    The body is streamed under the same byte caps and deadline as get_limited,
+    so an oversized download raises DownloadTooLarge here too.
+    """
+    scraper, lock = get_scraper(url)
+    domain = _domain(url)
+    if domain not in _cleared:
+        with lock:
+            # Callers queued behind the first request skip the lock once it has passed
+            if domain not in _cleared:
+                response = get_limited(url, timeout=timeout, session=scraper, **kwargs)
+                _record(scraper, domain, response)
+                return response
+    response = get_limited(url, timeout=timeout, session=scraper, **kwargs)
+    with lock:
+        _record(scraper, domain, response)
+    return response
+
+
+def _record(scraper, domain, response):
+    """Update the domain's clearance after a response. Call with the domain lock held."""
+    if response.ok:
+        _cleared.add(domain)
+        _save_state(scraper, domain)
+    elif response.status_code in (403, 503):
+        _cleared.discard(domain)
+
+
+def close_all():
+    with _lock:
+        scrapers = list(_scrapers.values())
+        _scrapers.clear()
+        _domain_locks.clear()
+        _cleared.clear()
+    for scraper in scrapers:
+        scraper.close()
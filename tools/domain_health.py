@@ -0,0 +1,170 @@
+import time
+import threading
+import logging
+import requests
+from urllib.parse import urlparse
+from tools.ttl_cache import TTLCache
+from tools.url_registry import normalize_url
+
+logger = logging.getLogger(__name__)
+
+# Consecutive domain-level failures before the circuit opens
+FAILURE_THRESHOLD = 3
+# Seconds a tripped domain is skipped before one trial request is let through
+COOLDOWN = 600
+# Seconds a failed URL is remembered and not fetched again
+NEGATIVE_TTL = 1800
+
+# Statuses that mean the site is blocking or overloaded, not that one page is missing
+BLOCKING_STATUSES = frozenset([401, 403, 429, 503, 520, 521, 522, 523, 524])
+
+
+def classify_error(error):
+    """
+    Return (reason, domain_level) for a scrape exception.
+
+    Blocking statuses, timeouts and connection errors say something about the
+    whole domain; anything else (404, parse errors, ...) only about the URL.
+    """
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return f"HTTP {status}", status in BLOCKING_STATUSES
+    if isinstance(error, requests.Timeout):
+        return "timeout", True
+    if isinstance(error, requests.ConnectionError):
+        return "connection error", True
+    return type(error).__name__, False
+
+
+def domain_of(url):
+    host = (urlparse(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class DomainHealth:
+    """
+    Circuit breaker per domain plus a negative cache of failed URLs.
+
+    After FAILURE_THRESHOLD consecutive domain-level failures the domain is
+    skipped for COOLDOWN seconds. Once the cool-down has passed a single trial
+    request is allowed (half-open); success closes the circuit, failure opens
+    it again for another cool-down.
+    """
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN, negative_ttl=NEGATIVE_TTL):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._domains = {}
+        self._lock = threading.Lock()
+        self._failed_urls = TTLCache('scrape_failures', maxsize=4096, ttl=negative_ttl)
+        self.skipped = 0
+
+    def _state(self, domain):
+        state = self._domains.get(domain)
+        if state is None:
+            state = {'failures': 0, 'open_until': 0.0, 'trial': False, 'reasons': [], 'trips': 0}
+            self._domains[domain] = state
+        return state
+
+    def check(self, url):
+        """
+        Return None if the URL may be fetched, otherwise the reason it is skipped.
+        """
+        failed = self._failed_urls.get(normalize_url(url))
+        if failed is not None:
+            with self._lock:
+                self.skipped += 1
+            return f"recently failed ({failed})"
+
+        domain = domain_of(url)
+        now = time.time()
+        with self._lock:
+            state = self._domains.get(domain)
+            if state is None or state['failures'] < self.failure_threshold:
+                return None
+            if now < state['open_until'] or state['trial']:
+                self.skipped += 1
+                last_reason = state['reasons'][-1] if state['reasons'] else 'unknown'
+                return f"domain {domain} is cooling down after {state['failures']} failures ({last_reason})"
+            # Half-open: let this one request through as a trial
+            state['trial'] = True
+            return None
+
+    def is_open(self, url):
+        """
+        Whether the URL's domain is currently being skipped.
+
+        Unlike check, this never hands out the half-open trial, so callers can
+        ask before deciding whether to start work on a domain at all.
+        """
+        domain = domain_of(url)
+        with self._lock:
+            state = self._domains.get(domain)
+            if state is None or state['failures'] < self.failure_threshold:
+                return False
+            return time.time() < state['open_until'] or state['trial']
+
+    def _close(self, domain):
+        with self._lock:
+            state = self._domains.get(domain)
+            if state is not None:
+                state['failures'] = 0
+                state['open_until'] = 0.0
+                state['trial'] = False
+
+    def record_success(self, url):
+        self._close(domain_of(url))
+
+    def record_failure(self, url, reason, domain_level=True):
+        """
+        Remember a failed URL and, for domain-level failures, count it towards the breaker.
+
+        A URL-level failure (404, nothing extractable, ...) still means the domain
+        answered, so it closes the circuit like a success would.
+        """
+        self._failed_urls.set(normalize_url(url), reason)
+        if not domain_level:
+            self._close(domain_of(url))
+            return
+
+        domain = domain_of(url)
+        with self._lock:
+            state = self._state(domain)
+            state['failures'] += 1
+            state['trial'] = False
+            state['reasons'] = (state['reasons'] + [reason])[-5:]
+            if state['failures'] >= self.failure_threshold:
+                state['open_until'] = time.time() + self.cooldown
+                state['trips'] += 1
+                logger.warning(f"Circuit open for {domain} for {self.cooldown}s after "
+                               f"{state['failures']} failures: {', '.join(state['reasons'])}")
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            open_domains = {
+                domain: {
+                    'failures': state['failures'],
+                    'reopens_in': round(max(0.0, state['open_until'] - now)),
+                    'reasons': list(state['reasons'])
+                }
+                for domain, state in self._domains.items()
+                if state['failures'] >= self.failure_threshold
+            }
+            return {
+                'tracked_domains': len(self._domains),
+                'open_domains': open_domains,
+                'skipped': self.skipped
+            }
+
+
+_health = None
+_health_lock = threading.Lock()
+
+
+def get_domain_health():
+    """Return the process-wide domain health tracker, shared by every hospital."""
+    global _health
+    with _health_lock:
+        if _health is None:
+            _health = DomainHealth()
+        return _health
@@ -5,6 +5,7 @@ import random
 from urllib.parse import urlparse
 import re
 from openai import OpenAI
+from tools.llm_cache import cached_chat_completion
 import streamlit as st
 from dotenv import load_dotenv
 
@@ -81,7 +82,7 @@ def enhanced_openai_search(
                     st.write(f"Searching: {search_query}")
                     
                     # Use OpenAI's web search functionality
-                    completion = client.chat.completions.create(
+                    completion = cached_chat_completion(client,
                         model="gpt-4o-mini-search-preview",
                         web_search_options={},
                         messages=[
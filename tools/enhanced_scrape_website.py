@@ -1,26 +1,29 @@
-import streamlit as st
 import requests
-from bs4 import BeautifulSoup
 import logging
 import time
 import re
-import pdfplumber
-import io
 # from selenium.webdriver.chrome.options import Options
 # from selenium.webdriver.chrome.service import Service
 # from selenium import webdriver
-import cloudscraper
 # from webdriver_manager.chrome import ChromeDriverManager
 from urllib.parse import urlparse
 from typing import Any
+from tools.scrape_cache import get_scrape_cache, content_kind
+from tools.progress import publish
+from tools.http_pool import get_limited, DownloadTooLarge
+from tools.html_extract import extract_text
+from tools.pdf_extract import extract_pdf_text, is_pdf_url
+from tools.cloudscraper_pool import fetch as cloudscraper_fetch
+from tools.domain_health import get_domain_health, classify_error, BLOCKING_STATUSES
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def advanced_scrape_website(url: str, selector: str = None, wait_time: int = 0, javascript: bool = False) -> str:
-    st.write(f"Scraping: {url}")
+def advanced_scrape_website(url: str, selector: str = None, wait_time: int = 0, javascript: bool = False,
+                            pdf_mode: str = 'text') -> str:
+    publish('started', url, f"Scraping: {url}")
     user_agents = [
         'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
         'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.0 Safari/605.1.15',
@@ -38,77 +41,64 @@ def advanced_scrape_website(url: str, selector: str = None, wait_time: int = 0,
         'Cache-Control': 'max-age=0',
     }
     
+    # Serve fresh cache hits without any network I/O
+    cache = get_scrape_cache()
+    # The PDF mode only changes what is extracted from PDFs, so HTML pages share
+    # one cache entry whichever category asks for them
+    html_variant = f"selector={selector}" if selector else None
+    pdf_variant = '&'.join(filter(None, [html_variant, f"pdf={pdf_mode}" if pdf_mode != 'text' else None])) or None
+    cache_variant = pdf_variant if is_pdf_url(url) else html_variant
+    cached = cache.get(url, cache_variant) if cache else None
+    if cache and cache_variant != pdf_variant and (cached is None or content_kind(cached['content_type'], url) == 'pdf'):
+        # A PDF behind an HTML-looking URL is stored under the PDF mode's entry.
+        # Nothing in the URL says so, so that entry is also tried on a miss.
+        pdf_cached = cache.get(url, pdf_variant)
+        if cached is not None or pdf_cached is not None:
+            cache_variant, cached = pdf_variant, pdf_cached
+    if cached and cached['fresh']:
+        publish('done', url, f"Using cached content ({len(cached['text'])} characters)", method='cache', chars=len(cached['text']))
+        return cached['text']
+    
+    # Skip URLs that just failed and domains whose circuit is open
+    health = get_domain_health()
+    skip_reason = health.check(url)
+    if skip_reason:
+        if cached:
+            publish('done', url, f"Skipped fetch ({skip_reason}), using stale cached copy", method='cache', chars=len(cached['text']))
+            return cached['text']
+        publish('failed', url, f"Skipped: {skip_reason}", reason=skip_reason)
+        return f"Error scraping this URL: skipped, {skip_reason}"
+    
+    # Response metadata of the successful fetch, stored alongside the cached text
+    fetch_meta = {}
+    NOT_MODIFIED = object()
+    revalidation_headers = cache.conditional_headers(cached) if cached else {}
+    
     def get_domain(url):
         parsed_uri = urlparse(url)
         return '{uri.scheme}://{uri.netloc}'.format(uri=parsed_uri)
     
     def clean_text(text):
-        text = re.sub(r'\s+', ' ', text)
-        text = re.sub(r'\n+', '\n', text)
-        text = '\n'.join(line for line in text.splitlines() if line.strip())
+        # Collapse whitespace within lines but keep the line structure, which
+        # the cross-page boilerplate filter relies on
+        text = re.sub(r'[^\S\n]+', ' ', text)
+        text = '\n'.join(line.strip() for line in text.splitlines() if line.strip())
         return text
     
-    def extract_with_beautifulsoup(html_content, target_selector=None):
-        soup = BeautifulSoup(html_content, 'html.parser')
-
-        try:
-            import lxml
-            soup = BeautifulSoup(html_content, 'lxml')
-        except ImportError:
-            pass
-        for element in soup.select('script, style, meta, link, noscript, header, footer, nav, iframe, svg'):
-            element.decompose()
-        if target_selector:
-            selected_elements = soup.select(target_selector)
-            if selected_elements:
-                content = '\n'.join(element.get_text(separator='\n', strip=True) for element in selected_elements)
-                return content
-        for content_selector in ['main', '#content', '.content', 'article', '.article', '.post', '#main', '.main-content', '.post-content']:
-            main_content = soup.select(content_selector)
-            if main_content:
-                content = '\n'.join(element.get_text(separator='\n', strip=True) for element in main_content)
-                if len(content) > 250:  
-                    return content
-        
-        return soup.get_text(separator='\n', strip=True)
-    
     def extract_pdf_content(pdf_content):
-        try:
-            import PyPDF2
-            
-            pdf_file = io.BytesIO(pdf_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            text = ""
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text += page.extract_text() + "\n\n"
-            
-            return clean_text(text)
-        except ImportError:
-            st.warning("PyPDF2 is not installed. Install it with 'pip install PyPDF2'")
-            return "ERROR: PyPDF2 library is required to extract PDF content. Install it with 'pip install PyPDF2'"
-        except Exception as e:
-            logger.error(f"Error extracting PDF content: {str(e)}")
-            try:
-
-                
-                pdf_file = io.BytesIO(pdf_content)
-                with pdfplumber.open(pdf_file) as pdf:
-                    text = ""
-                    for page in pdf.pages:
-                        text += page.extract_text() + "\n\n"
-                
-                return clean_text(text)
-            except ImportError:
-                st.warning("pdfplumber is not installed. Install it with 'pip install pdfplumber'")
-                return f"ERROR: Failed to extract PDF content: {str(e)}. Try installing pdfplumber with 'pip install pdfplumber'"
-            except Exception as e2:
-                logger.error(f"Error extracting PDF with pdfplumber: {str(e2)}")
-                return f"ERROR: Failed to extract PDF content with both PyPDF2 and pdfplumber: {str(e)}, {str(e2)}"
+        # Parsing runs in the shared process pool, bounded by page count and time
+        result = extract_pdf_text(pdf_content, mode=pdf_mode)
+        if 'error' in result:
+            logger.error(f"Error extracting PDF content: {result['error']}")
+            return f"ERROR: Failed to extract PDF content: {result['error']}"
+        if result['total_pages'] > result['pages']:
+            publish('info', url, f"PDF has {result['total_pages']} pages, extracted {result['pages']} ({pdf_mode} mode)")
+        return clean_text(result['text'])
     
-    def is_pdf_url(url):
-        return url.lower().endswith('.pdf') or '/pdf/' in url.lower()
+    def unreachable():
+        # A timeout, a refused connection or an oversized download will not be fixed by another client
+        return 'error' in fetch_meta and isinstance(fetch_meta['error'],
+                                                    (requests.Timeout, requests.ConnectionError, DownloadTooLarge))
     
     def try_requests_method():
         for i, agent in enumerate(user_agents):
@@ -116,44 +106,59 @@ def advanced_scrape_website(url: str, selector: str = None, wait_time: int = 0,
                 current_headers = headers.copy()
                 current_headers['User-Agent'] = agent
                 current_headers['Referer'] = get_domain(url)
+                # Revalidate a stale cache entry instead of downloading it again
+                current_headers.update(revalidation_headers)
                 
-                session = requests.Session()
-                response = session.get(
+                response = get_limited(
                     url, 
                     headers=current_headers, 
                     timeout=15,
                     allow_redirects=True
                 )
+                if response.status_code == 304 and cached:
+                    fetch_meta['etag'] = response.headers.get('ETag')
+                    fetch_meta['last_modified'] = response.headers.get('Last-Modified')
+                    return NOT_MODIFIED
                 response.raise_for_status()
+                publish('bytes', url, f"Downloaded {len(response.content)} bytes", bytes=len(response.content))
                 
                 # Check if the response is a PDF
                 content_type = response.headers.get('Content-Type', '').lower()
+                fetch_meta['content_type'] = content_type
+                fetch_meta['etag'] = response.headers.get('ETag')
+                fetch_meta['last_modified'] = response.headers.get('Last-Modified')
                 if 'application/pdf' in content_type or is_pdf_url(url):
-                    st.write("Detected PDF content, extracting text...")
+                    publish('info', url, "Detected PDF content, extracting text...")
                     return extract_pdf_content(response.content)
                 
                 if 'application/json' in content_type:
                     return response.json()
                 
-                return extract_with_beautifulsoup(response.text, selector)
+                return extract_text(response.text, selector)
             except Exception as e:
                 logger.info(f"Attempt {i+1} with regular requests failed: {str(e)}")
-                if i == len(user_agents) - 1:
+                fetch_meta['error'] = e
+                # Only a block can depend on the User-Agent; timeouts, 404s etc. will not change
+                blocked = isinstance(e, requests.HTTPError) and e.response is not None \
+                    and e.response.status_code in BLOCKING_STATUSES
+                if i == len(user_agents) - 1 or not blocked:
                     raise e
                 continue
     
     def try_cloudscraper_method():
         try:
-            scraper = cloudscraper.create_scraper(delay=10, browser='chrome')
-            response = scraper.get(url)
+            # Pooled per domain, so a solved challenge and its cookies are reused
+            response = cloudscraper_fetch(url)
+            publish('bytes', url, f"Downloaded {len(response.content)} bytes (CloudScraper)", bytes=len(response.content))
             
             # Check if the response is a PDF
             content_type = response.headers.get('Content-Type', '').lower()
+            fetch_meta['content_type'] = content_type
             if 'application/pdf' in content_type or is_pdf_url(url):
-                st.write("Detected PDF content (CloudScraper), extracting text...")
+                publish('info', url, "Detected PDF content (CloudScraper), extracting text...")
                 return extract_pdf_content(response.content)
                 
-            return extract_with_beautifulsoup(response.text, selector)
+            return extract_text(response.text, selector)
         except ImportError:
             logger.warning("CloudScraper not installed, skipping this method")
             return None
@@ -212,29 +217,42 @@ def advanced_scrape_website(url: str, selector: str = None, wait_time: int = 0,
     try:
         # Special case for PDF URLs
         if is_pdf_url(url):
-            st.write("PDF URL detected, using direct PDF extraction")
+            publish('method', url, "PDF URL detected, using direct PDF extraction", method='pdf')
             try:
-                response = requests.get(url, headers=headers, timeout=15)
+                response = get_limited(url, headers=headers, timeout=15)
                 response.raise_for_status()
                 pdf_text = extract_pdf_content(response.content)
                 if pdf_text:
-                    st.write(f"Successfully extracted {len(pdf_text)} characters from PDF")
+                    health.record_success(url)
+                    publish('done', url, f"Successfully extracted {len(pdf_text)} characters from PDF", method='pdf', chars=len(pdf_text))
+                    if cache and not pdf_text.startswith("ERROR:"):
+                        cache.put(url, pdf_text, 'application/pdf',
+                                  response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                                  cache_variant)
                     return pdf_text
             except Exception as e:
                 logger.error(f"Error downloading PDF directly: {str(e)}")
+                fetch_meta['error'] = e
                 # Continue with other methods if direct PDF download fails
         
         content = None
         try:
+            if unreachable():
+                raise fetch_meta['error']
             content = try_requests_method()
-            if content:
-                st.write("Successfully scraped using standard requests")
+            if content and content is not NOT_MODIFIED:
+                publish('method', url, "Successfully scraped using standard requests", method='requests')
         except Exception as e:
             logger.info(f"Standard requests method failed: {str(e)}")
-        if not content:
+        if content is NOT_MODIFIED:
+            health.record_success(url)
+            publish('done', url, "Content not modified since last scrape, using cached copy", method='revalidated', chars=len(cached['text']))
+            cache.touch(url, cache_variant, fetch_meta.get('etag'), fetch_meta.get('last_modified'))
+            return cached['text']
+        if not content and not unreachable():
             content = try_cloudscraper_method()
             if content:
-                st.write("Successfully scraped using CloudScraper")
+                publish('method', url, "Successfully scraped using CloudScraper", method='cloudscraper')
 
         # if not content and javascript:
         #     content = try_selenium_method()
@@ -242,6 +260,13 @@ def advanced_scrape_website(url: str, selector: str = None, wait_time: int = 0,
         #         st.write("Successfully scraped using Selenium")
 
         if not content:
+            if 'error' in fetch_meta:
+                reason, domain_level = classify_error(fetch_meta['error'])
+            else:
+                # The page was fetched but had no extractable text (e.g. rendered by JavaScript)
+                reason, domain_level = 'no text extracted', False
+            health.record_failure(url, reason, domain_level)
+            publish('failed', url, "Failed to scrape the website with all available methods.", reason=reason)
             return "Failed to scrape the website with all available methods."
         
         if isinstance(content, dict):
@@ -252,11 +277,18 @@ def advanced_scrape_website(url: str, selector: str = None, wait_time: int = 0,
         if len(text_content) > 100000:
             text_content = text_content[:100000] + "\n\n[Content truncated due to length...]"
         
-        st.write(f"Successfully scraped {len(text_content)} characters")
+        health.record_success(url)
+        publish('done', url, f"Successfully scraped {len(text_content)} characters", chars=len(text_content))
+        if cache and not text_content.startswith("ERROR:"):
+            content_type = fetch_meta.get('content_type', '')
+            cache.put(url, text_content, content_type, fetch_meta.get('etag'), fetch_meta.get('last_modified'),
+                      pdf_variant if content_kind(content_type, url) == 'pdf' else html_variant)
         return text_content
         
     except Exception as e:
-        st.error(f"Error scraping {url}: {str(e)}")
+        reason, domain_level = classify_error(e)
+        health.record_failure(url, reason, domain_level)
+        publish('failed', url, f"Error scraping {url}: {str(e)}", reason=str(e))
         return f"Error scraping this URL: {str(e)}"
     
 
@@ -0,0 +1,142 @@
+import os
+import logging
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+logger = logging.getLogger(__name__)
+
+REMOVED_SELECTOR = 'script, style, meta, link, noscript, header, footer, nav, iframe, svg'
+REMOVED_TAGS = frozenset(tag.strip() for tag in REMOVED_SELECTOR.split(','))
+
+# Tried in order; the first one whose text is longer than MIN_CONTENT_LENGTH wins
+CONTENT_SELECTORS = ['main', '#content', '.content', 'article', '.article', '.post', '#main', '.main-content', '.post-content']
+MIN_CONTENT_LENGTH = 250
+
+# BeautifulSoup does not return strings inside these tags from get_text()
+NON_CONTENT_STRING_TAGS = frozenset(['template', 'rt', 'rp'])
+
+
+def extract_with_beautifulsoup(html_content, target_selector=None):
+    """Reference engine: one BeautifulSoup parse (lxml when available) plus CSS selects."""
+    soup = BeautifulSoup(html_content, 'lxml' if etree is not None else 'html.parser')
+    for element in soup.select(REMOVED_SELECTOR):
+        element.decompose()
+    if target_selector:
+        selected_elements = soup.select(target_selector)
+        if selected_elements:
+            content = '\n'.join(element.get_text(separator='\n', strip=True) for element in selected_elements)
+            return content
+    for content_selector in CONTENT_SELECTORS:
+        main_content = soup.select(content_selector)
+        if main_content:
+            content = '\n'.join(element.get_text(separator='\n', strip=True) for element in main_content)
+            if len(content) > MIN_CONTENT_LENGTH:
+                return content
+
+    return soup.get_text(separator='\n', strip=True)
+
+
+def _selector_matcher(selector):
+    """Matcher for the simple tag, #id and .class selectors in CONTENT_SELECTORS."""
+    if selector.startswith('#'):
+        element_id = selector[1:]
+        return lambda tag, attrib: attrib.get('id') == element_id
+    if selector.startswith('.'):
+        class_name = selector[1:]
+        return lambda tag, attrib: class_name in attrib.get('class', '').split()
+    return lambda tag, attrib: tag == selector
+
+
+_MATCHERS = [_selector_matcher(selector) for selector in CONTENT_SELECTORS]
+
+
+def extract_with_lxml(html_content, target_selector=None):
+    """
+    Fast path: one lxml parse and one walk over the tree.
+
+    During the walk every stripped text node is appended to the page text and to
+    the buffer of each content-selector match that encloses it, which reproduces
+    the output of extract_with_beautifulsoup without building a soup or running
+    separate selects. Arbitrary target selectors use the reference engine.
+    """
+    if target_selector or etree is None:
+        return extract_with_beautifulsoup(html_content, target_selector)
+
+    if isinstance(html_content, bytes):
+        html_content = html_content.decode('utf-8', errors='replace')
+    parser = etree.HTMLParser(encoding='utf-8', recover=True)
+    root = etree.fromstring(html_content.encode('utf-8', errors='replace'), parser)
+    if root is None:
+        return ''
+
+    page_text = []
+    matches = [[] for _ in CONTENT_SELECTORS]
+    active = []
+
+    def emit(text):
+        if text:
+            text = text.strip()
+            if text:
+                page_text.append(text)
+                for buffer in active:
+                    buffer.append(text)
+
+    def visit(element):
+        tag = element.tag
+        if not isinstance(tag, str) or tag in REMOVED_TAGS or tag in NON_CONTENT_STRING_TAGS:
+            # Comments, processing instructions and removed elements contribute nothing,
+            # but their tail text still belongs to the parent
+            return
+        opened = 0
+        attrib = element.attrib
+        for index, matcher in enumerate(_MATCHERS):
+            if matcher(tag, attrib):
+                buffer = []
+                matches[index].append(buffer)
+                active.append(buffer)
+                opened += 1
+        emit(element.text)
+        for child in element:
+            visit(child)
+            emit(child.tail)
+        if opened:
+            del active[-opened:]
+
+    try:
+        visit(root)
+    except RecursionError:
+        return extract_with_beautifulsoup(html_content)
+
+    for buffers in matches:
+        if buffers:
+            content = '\n'.join('\n'.join(buffer) for buffer in buffers)
+            if len(content) > MIN_CONTENT_LENGTH:
+                return content
+    return '\n'.join(page_text)
+
+
+ENGINES = {
+    'bs4': extract_with_beautifulsoup,
+    'lxml': extract_with_lxml
+}
+
+
+def register_engine(name, func):
+    """Register an extraction engine: func(html_content, target_selector=None) -> str."""
+    ENGINES[name] = func
+
+
+def default_engine():
+    name = os.environ.get("KLAIM_HTML_ENGINE")
+    if name in ENGINES:
+        return name
+    return 'lxml' if etree is not None else 'bs4'
+
+
+def extract_text(html_content, target_selector=None, engine=None):
+    """Extract readable text from an HTML page with the chosen (or default) engine."""
+    return ENGINES[engine or default_engine()](html_content, target_selector)
@@ -0,0 +1,208 @@
+import time
+import threading
+from collections import OrderedDict
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import urlparse
+from tools.scrape_cache import content_kind
+
+logger = logging.getLogger(__name__)
+
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 8
+# Hosts whose sessions are kept open at once, and seconds an unused session stays open
+MAX_SESSIONS = 64
+SESSION_IDLE_TIMEOUT = 300
+
+# Download caps per content kind, in bytes. Only the first 100,000 characters of
+# text are kept downstream, so anything past these sizes is wasted work.
+MAX_BYTES = {
+    'html': 2 * 1024 * 1024,
+    'json': 1024 * 1024,
+    'pdf': 20 * 1024 * 1024
+}
+DOWNLOAD_DEADLINE = 30
+CHUNK_SIZE = 64 * 1024
+
+# host -> (session, last used), least recently used first
+_sessions = OrderedDict()
+_lock = threading.Lock()
+
+
+def _make_retry():
+    # Only connection-level failures are retried here. Error statuses go back to
+    # the scraper, whose user-agent rotation and domain health already handle them.
+    return Retry(
+        total=2,
+        connect=2,
+        read=1,
+        status=0,
+        backoff_factor=0.5,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        raise_on_status=False
+    )
+
+
+def _host_key(url):
+    parsed = urlparse(url)
+    return f"{parsed.scheme.lower()}://{parsed.netloc.lower()}"
+
+
+def get_session(url):
+    """
+    Return the process-wide keep-alive session for the URL's host.
+
+    Sessions are created once per scheme+host with pooled connections and a
+    retry adapter, so repeated fetches from the same hospital domain reuse
+    their TCP/TLS connections across threads and categories. Sessions idle for
+    SESSION_IDLE_TIMEOUT seconds, and the least recently used ones beyond
+    MAX_SESSIONS, are closed so a long batch does not hold sockets open forever.
+    """
+    key = _host_key(url)
+    now = time.monotonic()
+    with _lock:
+        entry = _sessions.pop(key, None)
+        if entry is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                                  max_retries=_make_retry(), pool_block=False)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        else:
+            session = entry[0]
+        _sessions[key] = (session, now)
+        expired = []
+        while len(_sessions) > MAX_SESSIONS:
+            expired.append(_sessions.popitem(last=False)[1][0])
+        for host, (idle_session, last_used) in list(_sessions.items()):
+            if now - last_used <= SESSION_IDLE_TIMEOUT:
+                break
+            del _sessions[host]
+            expired.append(idle_session)
+    # Requests already running on an evicted session finish; its idle connections are closed
+    for idle_session in expired:
+        idle_session.close()
+    return session
+
+
+class DownloadTooLarge(requests.RequestException):
+    """Raised when a download that cannot be truncated exceeds its byte cap or deadline."""
+
+
+def get_limited(url, headers=None, timeout=15, max_bytes=None, deadline=None, allow_redirects=True, session=None):
+    """
+    GET a URL through the pooled session, streaming the body under a byte cap and a deadline.
+
+    Args:
+        url (str): URL to fetch
+        headers (dict): Request headers
+        timeout (int): Connect/read timeout in seconds
+        max_bytes (dict): Per content kind caps, defaults to MAX_BYTES
+        deadline (float): time.monotonic() value after which the download stops,
+            defaults to DOWNLOAD_DEADLINE seconds from now
+        session (requests.Session): Session to use instead of the pooled one for the host
+
+    HTML is truncated at the cap or deadline and still parsed. PDF and JSON
+    cannot be used partially, so an oversized Content-Length aborts before
+    the body is read, and hitting the cap or deadline raises DownloadTooLarge.
+    The returned response has its body loaded, so .content/.text/.json() work
+    as usual, and carries a .truncated flag.
+    """
+    caps = dict(MAX_BYTES, **(max_bytes or {}))
+    if deadline is None:
+        deadline = time.monotonic() + DOWNLOAD_DEADLINE
+
+    response = (session or get_session(url)).get(url, headers=headers, timeout=timeout,
+                                                 allow_redirects=allow_redirects, stream=True)
+    try:
+        kind = content_kind(response.headers.get('Content-Type'), url)
+        cap = caps.get(kind)
+        truncatable = kind == 'html'
+
+        content_length = response.headers.get('Content-Length')
+        if cap and content_length and content_length.isdigit() and int(content_length) > cap and not truncatable:
+            raise DownloadTooLarge(f"{kind} of {content_length} bytes exceeds the {cap} byte limit", response=response)
+
+        body = []
+        size = 0
+        truncated = False
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            body.append(chunk)
+            size += len(chunk)
+            if cap and size > cap:
+                truncated = True
+                reason = f"{kind} download exceeded the {cap} byte limit"
+                break
+            if time.monotonic() > deadline:
+                truncated = True
+                reason = f"{kind} download exceeded its deadline after {size} bytes"
+                break
+
+        if truncated:
+            # Drop the connection: the rest of the body is still on the wire
+            response.raw.close()
+            if not truncatable:
+                raise DownloadTooLarge(reason, response=response)
+            logger.info(f"{reason}, keeping the first {size} bytes of {url}")
+            body_bytes = b''.join(body)[:cap] if cap else b''.join(body)
+        else:
+            body_bytes = b''.join(body)
+
+        response._content = body_bytes
+        response._content_consumed = True
+        response.truncated = truncated
+        return response
+    finally:
+        response.close()
+
+
+def pool_stats():
+    """
+    Connection reuse per host: requests sent, connections opened and how many
+    requests went over an already-open connection.
+    """
+    with _lock:
+        sessions = {host: entry[0] for host, entry in _sessions.items()}
+
+    stats = {}
+    for host, session in sessions.items():
+        requests_sent = 0
+        connections = 0
+        adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+        for adapter in adapters.values():
+            pools = adapter.poolmanager.pools
+            for pool_key in list(pools.keys()):
+                pool = pools.get(pool_key)
+                if pool is None:
+                    continue
+                requests_sent += pool.num_requests
+                connections += pool.num_connections
+        stats[host] = {
+            'requests': requests_sent,
+            'connections': connections,
+            'reused': max(0, requests_sent - connections)
+        }
+    return stats
+
+
+def pool_summary():
+    stats = pool_stats()
+    total_requests = sum(s['requests'] for s in stats.values())
+    total_reused = sum(s['reused'] for s in stats.values())
+    return {
+        'hosts': len(stats),
+        'requests': total_requests,
+        'connections': sum(s['connections'] for s in stats.values()),
+        'reused': total_reused,
+        'reuse_rate': (total_reused / total_requests) if total_requests else 0.0
+    }
+
+
+def close_all():
+    with _lock:
+        sessions = [entry[0] for entry in _sessions.values()]
+        _sessions.clear()
+    for session in sessions:
+        session.close()
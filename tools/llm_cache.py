@@ -0,0 +1,174 @@
+import os
+import re
+import json
+import threading
+import logging
+from contextlib import contextmanager
+from tools.ttl_cache import TTLCache, make_cache_key
+from tools.rate_limits import limit
+
+logger = logging.getLogger(__name__)
+
+# Web-search answers go stale, so responses are kept for a week by default
+LLM_CACHE_TTL = int(os.environ.get("KLAIM_LLM_CACHE_TTL", 7 * 24 * 3600))
+
+llm_cache = TTLCache('llm', maxsize=1024, ttl=LLM_CACHE_TTL, disk=True)
+
+# LLM attributes that change what a crew agent answers
+LLM_SETTINGS = ('model', 'temperature', 'top_p', 'max_tokens', 'max_completion_tokens', 'seed', 'stop',
+                'presence_penalty', 'frequency_penalty', 'response_format', 'reasoning_effort')
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+_bypassed = 0
+
+
+@contextmanager
+def bypass_llm_cache():
+    """Skip cache lookups (but still store fresh responses) for calls made in this block on this thread."""
+    previous = getattr(_local, 'bypass', False)
+    _local.bypass = True
+    try:
+        yield
+    finally:
+        _local.bypass = previous
+
+
+def _bypassing(bypass):
+    global _bypassed
+    if bypass or getattr(_local, 'bypass', False) or os.environ.get("KLAIM_LLM_CACHE") == "off":
+        with _stats_lock:
+            _bypassed += 1
+        return True
+    return False
+
+
+def cached_call(key_parts, compute, bypass=False, ttl=None, validate=None):
+    """
+    Return the cached value for key_parts, or compute(), store and return it.
+
+    The key is a hash of key_parts (model, prompt, parameters, ...); the value
+    must be JSON-serializable. None results, and results that validate(value)
+    rejects, are returned but not cached.
+    """
+    key = make_cache_key(*key_parts)
+    if not _bypassing(bypass):
+        value = llm_cache.get(key)
+        # Entries stored before validation existed may not pass it
+        if value is not None and (validate is None or validate(value)):
+            return value
+    value = compute()
+    if value is not None and (validate is None or validate(value)):
+        llm_cache.set(key, value, ttl)
+    return value
+
+
+def completion_content(data):
+    """Message content of a dumped ChatCompletion, or None when it is missing."""
+    try:
+        return data['choices'][0]['message'].get('content')
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return None
+
+
+def is_complete_completion(data):
+    """
+    Whether a dumped ChatCompletion is worth caching: it finished normally
+    (finish_reason "stop", not "length" or "content_filter"), was not refused
+    and has non-empty content.
+    """
+    try:
+        choice = data['choices'][0]
+        message = choice['message']
+    except (KeyError, IndexError, TypeError):
+        return False
+    content = message.get('content')
+    return (choice.get('finish_reason') == 'stop' and not message.get('refusal')
+            and isinstance(content, str) and bool(content.strip()))
+
+
+def cached_chat_completion(client, bypass=False, ttl=None, validate=is_complete_completion, **params):
+    """
+    Drop-in for client.chat.completions.create(**params) backed by the LLM cache.
+
+    The key covers the model, messages and every other parameter. A cached
+    response is rebuilt as a ChatCompletion, so callers read
+    completion.choices[0].message.content as before. Only completions that
+    pass validate (given the dumped completion dict; by default
+    is_complete_completion) are cached, so truncated, refused or empty answers
+    are retried on the next call.
+    """
+    from openai.types.chat import ChatCompletion
+
+    def compute():
+        # Only a miss takes a slot of the shared OpenAI budget
+        with limit('openai'):
+            completion = client.chat.completions.create(**params)
+        return completion.model_dump(mode='json')
+
+    data = cached_call(('chat.completions', params), compute, bypass=bypass, ttl=ttl, validate=validate)
+    try:
+        return ChatCompletion.model_validate(data)
+    except Exception as e:
+        logger.warning(f"Discarding unreadable cached completion: {str(e)}")
+        return ChatCompletion.model_validate(cached_call(('chat.completions', params), compute, bypass=True, ttl=ttl,
+                                                         validate=validate))
+
+
+class CachedCrewOutput:
+    """Stand-in for a CrewOutput served from the cache; str() gives the raw output like CrewOutput."""
+    def __init__(self, raw):
+        self.raw = raw
+
+    def __str__(self):
+        return self.raw
+
+
+def is_json_output(text):
+    """Whether a crew's raw output is a JSON object or array, bare or in a ```json block."""
+    fenced = re.search(r'```(?:json)?\s*(.*?)\s*```', text, re.DOTALL)
+    try:
+        return isinstance(json.loads(fenced.group(1) if fenced else text), (dict, list))
+    except (TypeError, ValueError):
+        return False
+
+
+def _llm_settings(llm):
+    if llm is None or isinstance(llm, str):
+        return {'model': llm}
+    return {name: getattr(llm, name) for name in LLM_SETTINGS if getattr(llm, name, None) is not None}
+
+
+def _tool_names(tools):
+    return sorted(getattr(tool, 'name', type(tool).__name__) for tool in tools or [])
+
+
+def crew_cache_key(crew, model=None):
+    """Key parts describing everything that determines a crew's output."""
+    agents = [(agent.role, agent.goal, agent.backstory, _llm_settings(getattr(agent, 'llm', None)),
+               _tool_names(getattr(agent, 'tools', None)), getattr(agent, 'max_iter', None))
+              for agent in crew.agents]
+    tasks = [(task.description, task.expected_output, _tool_names(getattr(task, 'tools', None)))
+             for task in crew.tasks]
+    return ('crew.kickoff', model or os.environ.get("OPENAI_MODEL_NAME", ""), agents, tasks)
+
+
+def cached_kickoff(crew, bypass=False, ttl=None, validate=is_json_output):
+    """
+    Run crew.kickoff() through the LLM cache, keyed by its agents, tools, LLM settings and tasks.
+
+    Only outputs that pass validate (by default: parse as JSON) are cached, so
+    failure text such as an iteration-limit message is not replayed later.
+    """
+    def compute():
+        with limit('openai'):
+            return str(crew.kickoff())
+
+    return CachedCrewOutput(cached_call(crew_cache_key(crew), compute, bypass=bypass, ttl=ttl, validate=validate))
+
+
+def cache_stats():
+    stats = llm_cache.stats()
+    with _stats_lock:
+        stats['bypassed'] = _bypassed
+    return stats
@@ -0,0 +1,310 @@
+import io
+import re
+import time
+import hashlib
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from tools.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGES = 60
+PDF_TIMEOUT = 60
+MAX_WORKERS = 2
+
+# Revenue mode: pages scanned for keywords, seconds allowed for the scan, pages
+# kept in total and pages kept either side of a hit
+SCAN_MAX_PAGES = 100
+SCAN_SECONDS = 20
+REVENUE_MAX_PAGES = 10
+NEIGHBOUR_PAGES = 1
+# Statement headings and revenue lines. Generic words such as "income", "profit"
+# or "AED" appear on nearly every page of an annual report, so they are not used.
+REVENUE_PATTERN = re.compile(
+    r'\b(?:total\s+|net\s+)?revenues?\b|\bturnover\b|income\s+statement|profit\s+and\s+loss'
+    r'|statement\s+of\s+(?:profit\s+or\s+loss|comprehensive\s+income|income)',
+    re.IGNORECASE
+)
+# Figures such as 1,234,567 or (12,345); narrative pages that mention revenue have few
+AMOUNT_PATTERN = re.compile(r'\(?\d{1,3}(?:,\d{3})+\)?')
+MIN_AMOUNTS = 5
+
+PDF_MODES = ('text', 'revenue')
+
+# Extracted text keyed by the PDF's content hash, so the same report is parsed once
+pdf_text_cache = TTLCache('pdf_text', maxsize=128, ttl=30 * 24 * 3600, disk=True)
+
+
+def is_pdf_url(url):
+    """Whether a URL names a PDF; the extraction mode only matters for those."""
+    url = url.lower()
+    return url.endswith('.pdf') or '/pdf/' in url
+
+
+_pool = None
+_pool_lock = threading.Lock()
+# pool -> futures submitted to it that have not finished yet
+_pool_jobs = {}
+# One slot per worker process. Callers wait for a slot before submitting, so the
+# timeout only measures extraction time, never time spent queued behind other PDFs.
+_slots = threading.BoundedSemaphore(MAX_WORKERS)
+
+
+def _extract_pages(pdf_content, max_pages):
+    """
+    Extract the text of at most max_pages pages. Runs inside a worker process.
+
+    Returns a dict with either 'text' or 'error'.
+    """
+    errors = []
+    try:
+        import PyPDF2
+        reader = PyPDF2.PdfReader(io.BytesIO(pdf_content))
+        parts = []
+        for page in reader.pages[:max_pages]:
+            parts.append(page.extract_text() or '')
+        return {'text': "\n\n".join(parts), 'pages': len(parts), 'total_pages': len(reader.pages)}
+    except ImportError:
+        errors.append("PyPDF2 is not installed. Install it with 'pip install PyPDF2'")
+    except Exception as e:
+        errors.append(f"PyPDF2: {str(e)}")
+
+    try:
+        import pdfplumber
+        with pdfplumber.open(io.BytesIO(pdf_content)) as pdf:
+            parts = []
+            for page in pdf.pages[:max_pages]:
+                parts.append(page.extract_text() or '')
+            return {'text': "\n\n".join(parts), 'pages': len(parts), 'total_pages': len(pdf.pages)}
+    except ImportError:
+        errors.append("pdfplumber is not installed. Install it with 'pip install pdfplumber'")
+    except Exception as e:
+        errors.append(f"pdfplumber: {str(e)}")
+
+    return {'error': "; ".join(errors)}
+
+
+def _outline_pages(reader):
+    """Pages whose bookmark title names a revenue statement, read from the PDF outline."""
+    pages = set()
+
+    def walk(items):
+        for item in items:
+            if isinstance(item, list):
+                walk(item)
+            elif REVENUE_PATTERN.search(getattr(item, 'title', '') or ''):
+                try:
+                    pages.add(reader.get_destination_page_number(item))
+                except Exception:
+                    continue
+
+    try:
+        walk(getattr(reader, 'outline', None) or getattr(reader, 'outlines', None) or [])
+    except Exception:
+        return set()
+    return pages
+
+
+def _table_rows(table):
+    rows = []
+    for row in table:
+        cells = [' '.join(str(cell).split()) for cell in row if cell not in (None, '')]
+        if cells:
+            rows.append(' | '.join(cells))
+    return rows
+
+
+def _extract_revenue_pages(pdf_content, max_pages):
+    """
+    Extract only the financial pages of a report. Runs inside a worker process.
+
+    Revenue statements are located from the PDF's bookmarks when it has any.
+    Otherwise the text layer of at most SCAN_MAX_PAGES pages is scanned, for at
+    most SCAN_SECONDS, for pages with a revenue heading and many figures. The
+    hits and their neighbours (at most REVENUE_MAX_PAGES pages) are kept, with
+    their tables as "cell | cell | cell" rows. Documents without any match fall
+    back to plain text extraction.
+    """
+    try:
+        import PyPDF2
+        reader = PyPDF2.PdfReader(io.BytesIO(pdf_content))
+        total_pages = len(reader.pages)
+    except Exception:
+        return _extract_pages(pdf_content, max_pages)
+
+    keep = min(max_pages, REVENUE_MAX_PAGES)
+    page_texts = {}
+
+    def text_of(index):
+        if index not in page_texts:
+            page_texts[index] = reader.pages[index].extract_text() or ''
+        return page_texts[index]
+
+    hits = sorted(page for page in _outline_pages(reader) if 0 <= page < total_pages)
+    if not hits:
+        deadline = time.monotonic() + SCAN_SECONDS
+        for index in range(min(total_pages, SCAN_MAX_PAGES)):
+            if time.monotonic() > deadline or len(hits) >= keep:
+                break
+            text = text_of(index)
+            if REVENUE_PATTERN.search(text) and len(AMOUNT_PATTERN.findall(text)) >= MIN_AMOUNTS:
+                hits.append(index)
+    if not hits:
+        return _extract_pages(pdf_content, max_pages)
+
+    selected = []
+    for hit in hits:
+        for offset in [0] + [d for n in range(1, NEIGHBOUR_PAGES + 1) for d in (n, -n)]:
+            page = hit + offset
+            if 0 <= page < total_pages and page not in selected:
+                selected.append(page)
+    selected = sorted(selected[:keep])
+
+    tables = {}
+    try:
+        import pdfplumber
+        with pdfplumber.open(io.BytesIO(pdf_content)) as pdf:
+            for index in selected:
+                tables[index] = [row for table in pdf.pages[index].extract_tables() for row in _table_rows(table)]
+    except Exception:
+        # Without pdfplumber (or on a parse error) the selected pages keep their text only
+        pass
+
+    parts = ["\n".join([f"[Page {index + 1}]", text_of(index)] + tables.get(index, [])) for index in selected]
+    return {'text': "\n\n".join(parts), 'pages': len(selected), 'total_pages': total_pages}
+
+
+_WORKERS = {
+    'text': _extract_pages,
+    'revenue': _extract_revenue_pages
+}
+
+
+def _terminate(pool):
+    with _pool_lock:
+        _pool_jobs.pop(pool, None)
+    for process in list(getattr(pool, '_processes', {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _job_done(pool, future):
+    with _pool_lock:
+        jobs = _pool_jobs.get(pool)
+        if jobs is None:
+            return
+        jobs.discard(future)
+        finished = pool is not _pool and not jobs
+    if finished:
+        # Done callbacks run on the pool's own management thread; shut it down from another one
+        threading.Thread(target=_terminate, args=(pool,), daemon=True).start()
+
+
+def _submit(worker, *args):
+    """Submit a job to the current pool, starting one if needed. Returns (pool, future)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn avoids forking a process that is running many threads
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            _pool_jobs[_pool] = set()
+        pool = _pool
+        future = pool.submit(worker, *args)
+        _pool_jobs[pool].add(future)
+    future.add_done_callback(lambda done: _job_done(pool, done))
+    return pool, future
+
+
+def _retire_pool(pool, stuck=None):
+    """
+    Stop sending work to a pool whose worker is stuck or dead.
+
+    New jobs start on fresh workers; the old pool's processes are terminated
+    once every other caller's job on it has finished, so their work is not lost.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+        jobs = _pool_jobs.get(pool, set())
+        jobs.discard(stuck)
+        finished = not jobs
+    if finished:
+        _terminate(pool)
+
+
+def _run_in_thread(worker, pdf_content, max_pages, timeout):
+    """
+    Fallback when no worker process is available: run the worker in a daemon
+    thread and stop waiting after timeout seconds. A parse that overruns cannot
+    be killed, but it no longer holds up the calling I/O thread.
+    """
+    outcome = {}
+
+    def run():
+        try:
+            outcome['result'] = worker(pdf_content, max_pages)
+        except Exception as e:
+            outcome['result'] = {'error': str(e)}
+
+    thread = threading.Thread(target=run, name="pdf-extract", daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if 'result' not in outcome:
+        logger.error(f"PDF extraction timed out after {timeout} seconds")
+        return {'error': f"PDF extraction timed out after {timeout} seconds"}
+    return outcome['result']
+
+
+def extract_pdf_text(pdf_content, max_pages=MAX_PAGES, timeout=PDF_TIMEOUT, use_processes=True, mode='text'):
+    """
+    Extract text from PDF bytes without holding up the calling I/O thread.
+
+    The work runs in a process pool, is limited to max_pages pages and must
+    finish within timeout seconds of starting; time spent waiting for a free
+    worker does not count. If no worker process can be used, the same page and
+    time limits apply to a thread fallback. Results are cached by content hash.
+    mode='revenue' keeps only the pages around revenue figures, with tables.
+
+    Returns:
+        dict: {'text': ..., 'pages': n, 'total_pages': n} or {'error': ...}
+    """
+    worker = _WORKERS.get(mode, _extract_pages)
+    cache_key = f"{hashlib.sha256(pdf_content).hexdigest()}:{mode}:{max_pages}"
+    cached = pdf_text_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    result = None
+    if use_processes:
+        for attempt in range(2):
+            with _slots:
+                try:
+                    pool, future = _submit(worker, pdf_content, max_pages)
+                except Exception as e:
+                    logger.warning(f"PDF process pool unavailable, extracting in a thread: {str(e)}")
+                    break
+                try:
+                    result = future.result(timeout=timeout)
+                    break
+                except FutureTimeoutError:
+                    logger.error(f"PDF extraction timed out after {timeout} seconds")
+                    _retire_pool(pool, future)
+                    return {'error': f"PDF extraction timed out after {timeout} seconds"}
+                except BrokenProcessPool:
+                    # A worker died; retry once on fresh workers
+                    _retire_pool(pool)
+                    continue
+
+    if result is None:
+        with _slots:
+            result = _run_in_thread(worker, pdf_content, max_pages, timeout)
+
+    if 'text' in result:
+        if result['total_pages'] > result['pages']:
+            logger.info(f"PDF has {result['total_pages']} pages, extracted {result['pages']} ({mode} mode)")
+        pdf_text_cache.set(cache_key, result)
+    return result
@@ -0,0 +1,101 @@
+import queue
+import time
+import functools
+import threading
+import contextvars
+import logging
+
+logger = logging.getLogger(__name__)
+
+# started, bytes, method, done, failed, info
+EVENT_KINDS = ('started', 'bytes', 'method', 'done', 'failed', 'info')
+
+# Queue of the run being captured, if any. Each Streamlit session owns its own
+# queue, so concurrent sessions never see or clear each other's events.
+_sink = contextvars.ContextVar('progress_sink', default=None)
+
+
+def publish(kind, url=None, message='', **data):
+    """
+    Publish a structured progress event from any thread.
+
+    Events always go to logging. When the calling run is being captured (see
+    start_capture() and in_context()), they are also queued so the Streamlit
+    main thread can drain and render them.
+    """
+    event = {
+        'kind': kind,
+        'url': url,
+        'message': message,
+        'time': time.time(),
+        'thread': threading.current_thread().name,
+    }
+    event.update(data)
+
+    if kind == 'failed':
+        logger.warning(format_event(event))
+    else:
+        logger.info(format_event(event))
+
+    events = _sink.get()
+    if events is not None:
+        try:
+            events.put_nowait(event)
+        except queue.Full:
+            pass
+    return event
+
+
+def format_event(event):
+    message = event.get('message') or event['kind']
+    if event.get('url') and event['url'] not in message:
+        return f"[{event['kind']}] {message} ({event['url']})"
+    return f"[{event['kind']}] {message}"
+
+
+def start_capture():
+    """
+    Start queueing events published from this thread and from functions wrapped with in_context().
+
+    Returns:
+        queue.Queue: The run's event queue, for drain() and stop_capture()
+    """
+    events = queue.Queue(maxsize=10000)
+    _sink.set(events)
+    return events
+
+
+def stop_capture(events):
+    """Stop queueing events for this run and discard anything left in its queue."""
+    if _sink.get() is events:
+        _sink.set(None)
+    drain(events)
+
+
+def in_context(func):
+    """
+    Bind func to the caller's event queue so it keeps publishing there from a worker thread.
+
+    Thread pools do not inherit context variables, so wrap functions at submit time.
+    """
+    events = _sink.get()
+
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        token = _sink.set(events)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _sink.reset(token)
+    return run
+
+
+def drain(events, max_events=None):
+    """Return the events queued for a run without blocking."""
+    drained = []
+    while max_events is None or len(drained) < max_events:
+        try:
+            drained.append(events.get_nowait())
+        except queue.Empty:
+            break
+    return drained
@@ -0,0 +1,49 @@
+import threading
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Process-wide concurrency budget shared by every hospital being processed.
+DEFAULT_LIMITS = {
+    'serper': 5,
+    'openai': 8,
+    'scrape': 16
+}
+
+_limits = {name: threading.BoundedSemaphore(value) for name, value in DEFAULT_LIMITS.items()}
+_sizes = dict(DEFAULT_LIMITS)
+_config_lock = threading.Lock()
+
+
+def configure_limits(**limits):
+    """
+    Set the global caps, e.g. configure_limits(serper=5, openai=8, scrape=16).
+
+    Call this before starting work; calls already holding a slot keep the old budget.
+    """
+    with _config_lock:
+        for name, value in limits.items():
+            if value is None:
+                continue
+            value = max(1, int(value))
+            _limits[name] = threading.BoundedSemaphore(value)
+            _sizes[name] = value
+            logger.info(f"Concurrency limit for {name} set to {value}")
+
+
+def get_limits():
+    with _config_lock:
+        return dict(_sizes)
+
+
+@contextmanager
+def limit(name):
+    """Hold one slot of the named global budget for the duration of the block."""
+    with _config_lock:
+        semaphore = _limits[name]
+    semaphore.acquire()
+    try:
+        yield
+    finally:
+        semaphore.release()
@@ -0,0 +1,147 @@
+import os
+import time
+import sqlite3
+import threading
+import logging
+from tools.url_registry import normalize_url
+from tools.ttl_cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Time to live per content kind, in seconds
+DEFAULT_TTLS = {
+    'pdf': 30 * 24 * 3600,
+    'html': 7 * 24 * 3600,
+    'json': 24 * 3600
+}
+
+
+def content_kind(content_type, url=''):
+    content_type = (content_type or '').lower()
+    if 'application/pdf' in content_type or url.lower().endswith('.pdf'):
+        return 'pdf'
+    if 'application/json' in content_type:
+        return 'json'
+    return 'html'
+
+
+class ScrapeCache:
+    """
+    SQLite-backed cache of cleaned page text keyed by normalized URL.
+
+    Fresh entries are served without any network I/O. Stale entries keep their
+    ETag/Last-Modified validators so the scraper can revalidate them with a
+    conditional request and reuse the stored text on 304 Not Modified.
+    """
+    def __init__(self, path=None, ttls=None):
+        if path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            path = os.path.join(CACHE_DIR, "scrape_cache.sqlite3")
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                text TEXT,
+                content_type TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL,
+                expires_at REAL
+            )
+        """)
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    @staticmethod
+    def make_key(url, variant=None):
+        key = normalize_url(url)
+        return f"{key}#{variant}" if variant else key
+
+    def get(self, url, variant=None):
+        """Return the cached entry (with a 'fresh' flag) or None."""
+        key = self.make_key(url, variant)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, content_type, etag, last_modified, fetched_at, expires_at FROM pages WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            fresh = row[5] > time.time()
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return {
+            'text': row[0],
+            'content_type': row[1],
+            'etag': row[2],
+            'last_modified': row[3],
+            'fetched_at': row[4],
+            'fresh': fresh
+        }
+
+    def put(self, url, text, content_type='', etag=None, last_modified=None, variant=None):
+        now = time.time()
+        ttl = self.ttls.get(content_kind(content_type, url), self.ttls['html'])
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.make_key(url, variant), url, text, content_type, etag, last_modified, now, now + ttl)
+            )
+            self._conn.commit()
+
+    def touch(self, url, variant=None, etag=None, last_modified=None):
+        """Extend an entry's lifetime after a 304 Not Modified response."""
+        key = self.make_key(url, variant)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT content_type FROM pages WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return
+            ttl = self.ttls.get(content_kind(row[0], url), self.ttls['html'])
+            self._conn.execute(
+                "UPDATE pages SET fetched_at = ?, expires_at = ?, etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified) WHERE key = ?",
+                (now, now + ttl, etag, last_modified, key)
+            )
+            self._conn.commit()
+            self.revalidated += 1
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'revalidated': self.revalidated}
+
+
+_cache = None
+_cache_disabled = os.environ.get("KLAIM_SCRAPE_CACHE", "1") == "0"
+_cache_lock = threading.Lock()
+
+
+def get_scrape_cache():
+    """Return the process-wide scrape cache, or None if it cannot be opened."""
+    global _cache, _cache_disabled
+    with _cache_lock:
+        if _cache is None and not _cache_disabled:
+            try:
+                _cache = ScrapeCache()
+            except Exception as e:
+                logger.warning(f"Scrape cache disabled: {str(e)}")
+                _cache_disabled = True
+        return _cache
@@ -5,16 +5,27 @@ import json
 from urllib.parse import urlparse
 import logging
 import os
+from tools.rate_limits import limit
+from tools.ttl_cache import TTLCache, make_cache_key
+from tools.progress import publish
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 SERPER_API_URL = "https://google.serper.dev/search"
 
-def search_serper(query , serper_api ,  max_results=10 , max_retries=3):
+# Search responses are reused for identical (query, num, gl, location) requests
+serper_cache = TTLCache('serper', maxsize=1024, ttl=12 * 3600, disk=True)
+
+def set_serper_cache(cache):
+    """Swap the response cache, e.g. set_serper_cache(TTLCache('serper', ttl=600)) or None to disable."""
+    global serper_cache
+    serper_cache = cache
+
+def search_serper(query , serper_api ,  max_results=10 , max_retries=3, use_cache=True):
     if not any(keyword in query.lower() for keyword in ['uae', 'dubai', 'abu dhabi', 'sharjah']):
         query = f"{query} UAE hospital"
         
-    logger.info(f"Searching with Serper: {query}")
+    publish('started', message=f"Searching with Serper: {query}", query=query)
     if not serper_api:
         logger.error("Serper API key is not set. Set the serper_api environment variable.")
         return {"error": "Serper API key is not set. Set the serper_api environment variable."}
@@ -31,14 +42,23 @@ def search_serper(query , serper_api ,  max_results=10 , max_retries=3):
         "gl": "ae"
     }
     
+    cache = serper_cache if use_cache else None
+    cache_key = make_cache_key(payload["q"], payload["num"], payload["gl"], payload["location"])
+    if cache is not None:
+        cached_results = cache.get(cache_key)
+        if cached_results is not None:
+            logger.info(f"Using cached Serper results for: {query}")
+            return cached_results
+    
     for retry in range(max_retries):
         try:
-            response = requests.post(
-                SERPER_API_URL,
-                headers=headers,
-                data=json.dumps(payload),
-                timeout=30
-            )
+            with limit('serper'):
+                response = requests.post(
+                    SERPER_API_URL,
+                    headers=headers,
+                    data=json.dumps(payload),
+                    timeout=30
+                )
             response.raise_for_status()
             search_results = response.json()
             
@@ -54,7 +74,9 @@ def search_serper(query , serper_api ,  max_results=10 , max_retries=3):
                         "snippet": snippet
                     })
                 
-                logger.info(f"Found {len(results)} search results")
+                publish('done', message=f"Found {len(results)} search results for: {query}", query=query, results=len(results))
+                if cache is not None and results:
+                    cache.set(cache_key, results)
                 return results
             result_types = [key for key in search_results if key not in ["searchParameters", "timestampUsec"]]
             if result_types:
@@ -84,6 +106,8 @@ def search_serper(query , serper_api ,  max_results=10 , max_retries=3):
 
                 if alternative_results:
                     logger.info(f"Found {len(alternative_results)} alternative results")
+                    if cache is not None:
+                        cache.set(cache_key, alternative_results)
                     return alternative_results
             logger.warning("No search results found in any category")
             return []
@@ -99,7 +123,7 @@ def search_serper(query , serper_api ,  max_results=10 , max_retries=3):
             else:
 
                 time.sleep(random.uniform(1, 2))
-    logger.error(f"Failed to get search results after {max_retries} attempts")
+    publish('failed', message=f"Failed to get search results after {max_retries} attempts", query=query)
     return {"error": f"Failed to get search results after {max_retries} attempts: {error_msg}"} 
 
 def fallback_search(query, max_results=10):
@@ -0,0 +1,296 @@
+import re
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlparse, urljoin
+from tools.http_pool import get_session, get_limited
+from tools.progress import publish, in_context
+from tools.rate_limits import limit
+from tools.domain_health import get_domain_health, classify_error
+
+logger = logging.getLogger(__name__)
+
+# Search results on these domains are listings or profiles, never the hospital's own site
+DIRECTORY_DOMAINS = frozenset([
+    'facebook.com', 'instagram.com', 'linkedin.com', 'twitter.com', 'x.com', 'youtube.com',
+    'tiktok.com', 'wikipedia.org', 'google.com', 'goo.gl', 'maps.app.goo.gl', 'yelp.com',
+    'tripadvisor.com', 'yellowpages.ae', 'yellowpages-uae.com', 'dubizzle.com', 'bayut.com',
+    'zawya.com', 'bloomberg.com', 'crunchbase.com', 'glassdoor.com', 'indeed.com',
+    'okadoc.com', 'practo.com', 'healthgrades.com', 'doctoruna.com', 'vezeeta.com',
+    'justlife.com', 'connect.ae', 'dha.gov.ae', 'doh.gov.ae', 'mohap.gov.ae', 'ehs.gov.ae'
+])
+
+# Paths tried when the sitemap does not list a page for a category
+KNOWN_PATHS = ['/contact', '/contact-us', '/about', '/about-us', '/our-doctors', '/doctors',
+               '/insurance', '/departments', '/specialties', '/leadership']
+
+# Category -> URL path keywords. A page can feed several categories.
+CATEGORY_PATTERNS = {
+    'phone': re.compile(r'contact|reach-us|find-us|locations?\b', re.IGNORECASE),
+    'location': re.compile(r'contact|locations?\b|find-us|branches|directions', re.IGNORECASE),
+    'ceo': re.compile(r'about|leadership|management|board|executive|our-team|ceo', re.IGNORECASE),
+    'management': re.compile(r'about|leadership|management|board|executive|our-team', re.IGNORECASE),
+    'insurance': re.compile(r'insurance|insurers|payers|tpa\b|network-partners', re.IGNORECASE),
+    'specialties': re.compile(r'departments?|speciali[sz]?t?ies|specialities|centres?-of|centers?-of|clinics\b|services\b', re.IGNORECASE),
+    'doctors': re.compile(r'doctors|physicians|consultants|find-a-doctor|our-team', re.IGNORECASE)
+}
+
+# Words of a hospital name that say nothing about which site is its own
+GENERIC_NAME_WORDS = frozenset([
+    'the', 'and', 'hospital', 'hospitals', 'medical', 'center', 'centre', 'clinic', 'clinics',
+    'healthcare', 'health', 'care', 'group', 'llc', 'specialty', 'speciality', 'general',
+    'city', 'international', 'day', 'surgery', 'uae', 'emirates', 'dubai', 'abu', 'dhabi',
+    'sharjah', 'ajman', 'fujairah', 'ras', 'khaimah', 'umm', 'quwain', 'ain'
+])
+
+MAX_PAGES = 12
+PAGES_PER_CATEGORY = 2
+MAX_SITEMAPS = 4
+MIN_PAGE_LENGTH = 200
+# Seconds the whole crawl may take, and per request while planning it
+CRAWL_TIMEOUT = 60
+REQUEST_TIMEOUT = 8
+
+ERROR_PREFIXES = ("Error scraping", "Failed to scrape", "ERROR:")
+
+LOC_PATTERN = re.compile(r'<loc>\s*([^<\s]+)\s*</loc>', re.IGNORECASE)
+# Separators between the parts of a page title ("Name | Home", "Name - About us")
+TITLE_SEPARATORS = re.compile(r'\s[|\-\u2013\u2014:\u00b7]\s|\|')
+HREF_PATTERN = re.compile(r'href\s*=\s*["\']([^"\'#]+)["\']', re.IGNORECASE)
+
+
+def registered_domain(url):
+    host = (urlparse(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def is_directory(url):
+    host = registered_domain(url)
+    return any(host == domain or host.endswith('.' + domain) for domain in DIRECTORY_DOMAINS)
+
+
+def is_scraped(text):
+    """Whether a scrape returned usable page text rather than an error message."""
+    return isinstance(text, str) and len(text) >= MIN_PAGE_LENGTH and not text.startswith(ERROR_PREFIXES)
+
+
+def name_tokens(hospital_name):
+    """Distinctive words of a hospital name, without generic words and place names."""
+    words = re.findall(r'[a-z0-9]+', (hospital_name or '').lower())
+    return [word for word in words if len(word) >= 3 and word not in GENERIC_NAME_WORDS]
+
+
+def _host_matches(url, tokens):
+    label = registered_domain(url).replace('-', '')
+    return any(token in label for token in tokens)
+
+
+def _title_matches(title, tokens):
+    # A segment of the title must be the name itself: "Mediclinic City Hospital | Home"
+    # matches, a headline that merely mentions the hospital does not
+    return bool(tokens) and any(
+        name_tokens(segment) == tokens for segment in TITLE_SEPARATORS.split(title or '')
+    )
+
+
+def find_official_site(results, hospital_name):
+    """
+    Return the scheme://host root of the hospital's own site among search results.
+
+    News and aggregator sites are not official just because they are not in
+    DIRECTORY_DOMAINS, so a site is only accepted when its host contains a
+    distinctive word of the hospital name or, failing that, when a segment of
+    its page title is the hospital name. Returns None when nothing matches; the crawl is then
+    skipped.
+
+    Args:
+        results (list): (url, title) pairs; pass only URLs that were scraped
+            successfully (see is_scraped)
+        hospital_name (str): Name the search was made for
+    """
+    tokens = name_tokens(hospital_name)
+    candidates = []
+    for url, title in results:
+        if not url or is_directory(url) or url.lower().endswith('.pdf'):
+            continue
+        parsed = urlparse(url)
+        if parsed.scheme in ('http', 'https') and parsed.netloc:
+            candidates.append((f"{parsed.scheme}://{parsed.netloc}", url, title))
+
+    for site, url, title in candidates:
+        if _host_matches(url, tokens):
+            return site
+    for site, url, title in candidates:
+        if _title_matches(title, tokens):
+            return site
+    return None
+
+
+def _same_site(url, site):
+    return registered_domain(url) == registered_domain(site)
+
+
+def _request(url, deadline, method='GET'):
+    """
+    GET or HEAD a URL while planning the crawl, or return None.
+
+    Requests share the global scrape budget and the domain's circuit breaker,
+    and are not started once the crawl deadline has passed.
+    """
+    remaining = deadline - time.monotonic()
+    health = get_domain_health()
+    if remaining <= 0 or health.check(url):
+        return None
+    timeout = min(REQUEST_TIMEOUT, remaining)
+    try:
+        with limit('scrape'):
+            if method == 'HEAD':
+                response = get_session(url).head(url, timeout=timeout, allow_redirects=True)
+            else:
+                response = get_limited(url, timeout=timeout, deadline=deadline)
+    except Exception as e:
+        reason, domain_level = classify_error(e)
+        health.record_failure(url, reason, domain_level)
+        logger.info(f"Crawl request to {url} failed: {reason}")
+        return None
+    health.record_success(url)
+    return response
+
+
+def _sitemap_urls(site, deadline):
+    """Page URLs listed in the site's sitemap(s), following a sitemap index a few levels deep."""
+    to_read = [urljoin(site, '/sitemap.xml')]
+    robots = _request(urljoin(site, '/robots.txt'), deadline)
+    if robots is not None and robots.ok:
+        to_read += re.findall(r'(?im)^sitemap:\s*(\S+)', robots.text)
+
+    pages = []
+    seen = set()
+    while to_read and len(seen) < MAX_SITEMAPS:
+        sitemap = to_read.pop(0)
+        if sitemap in seen:
+            continue
+        seen.add(sitemap)
+        response = _request(sitemap, deadline)
+        if response is None or not response.ok:
+            continue
+        for loc in LOC_PATTERN.findall(response.text):
+            if loc.lower().endswith('.xml'):
+                to_read.append(loc)
+            elif _same_site(loc, site):
+                pages.append(loc)
+    return pages
+
+
+def _homepage_links(site, deadline):
+    """Same-site links on the home page, used when there is no sitemap."""
+    response = _request(site, deadline)
+    if response is None or not response.ok:
+        return []
+    links = (urljoin(response.url, href) for href in HREF_PATTERN.findall(response.text))
+    return [link for link in links if link.startswith('http') and _same_site(link, site)]
+
+
+def _exists(url, deadline):
+    response = _request(url, deadline, method='HEAD')
+    # Some servers refuse HEAD; only a missing page rules the path out
+    return response is not None and (response.status_code < 400 or response.status_code == 405)
+
+
+def plan_pages(site, max_pages=MAX_PAGES, deadline=None, max_workers=4):
+    """
+    Choose the pages to crawl: {url: [categories]}.
+
+    Sitemap entries (or home page links) whose path matches a category come
+    first, shortest path first; known paths fill categories that are still
+    empty if they exist on the site, checked concurrently.
+    """
+    if deadline is None:
+        deadline = time.monotonic() + CRAWL_TIMEOUT
+    candidates = _sitemap_urls(site, deadline) or _homepage_links(site, deadline)
+    candidates = sorted(set(candidates), key=lambda url: (len(urlparse(url).path), url))
+
+    plan = {}
+    per_category = {category: 0 for category in CATEGORY_PATTERNS}
+
+    def add(url, categories):
+        categories = [c for c in categories if per_category[c] < PAGES_PER_CATEGORY]
+        if not categories or len(plan) >= max_pages:
+            return
+        plan.setdefault(url, []).extend(categories)
+        for category in categories:
+            per_category[category] += 1
+
+    for url in candidates:
+        path = urlparse(url).path
+        add(url, [category for category, pattern in CATEGORY_PATTERNS.items() if pattern.search(path)])
+
+    known = {}
+    for path in KNOWN_PATHS:
+        categories = [c for c, pattern in CATEGORY_PATTERNS.items() if pattern.search(path) and per_category[c] == 0]
+        url = urljoin(site, path)
+        if categories and url not in plan:
+            known[url] = categories
+    if known and len(plan) < max_pages:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            found = list(executor.map(in_context(lambda url: _exists(url, deadline)), known))
+        for url, exists in zip(known, found):
+            if exists:
+                add(url, known[url])
+    return plan
+
+
+def crawl_official_site(site, fetch, max_pages=MAX_PAGES, max_workers=4, timeout=CRAWL_TIMEOUT):
+    """
+    Crawl a bounded set of pages of the hospital's own site.
+
+    Args:
+        site (str): scheme://host of the official site
+        fetch (callable): fetch(url) -> text, e.g. a registry-backed scrape
+        max_pages (int): Maximum number of pages fetched
+        max_workers (int): Concurrent page fetches
+        timeout (float): Seconds the whole crawl may take; pages still loading are left out
+
+    Returns:
+        dict: category -> list of {'url': ..., 'text': ...}
+    """
+    pages = {}
+    # Leave the half-open trial, if any, to the first planning request
+    if get_domain_health().is_open(site):
+        publish('info', site, f"Not crawling {site}: its domain is cooling down after repeated failures")
+        return pages
+
+    publish('info', site, f"Crawling official site {site}")
+    deadline = time.monotonic() + timeout
+    plan = plan_pages(site, max_pages, deadline, max_workers)
+    if not plan:
+        return pages
+
+    def fetch_page(url):
+        try:
+            return url, fetch(url)
+        except Exception as e:
+            logger.info(f"Crawl of {url} failed: {str(e)}")
+            return url, None
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [executor.submit(in_context(fetch_page), url) for url in plan]
+        done, not_done = wait(futures, timeout=max(0, deadline - time.monotonic()))
+    finally:
+        # Do not wait for pages still loading past the deadline
+        executor.shutdown(wait=False, cancel_futures=True)
+    if not_done:
+        logger.info(f"Crawl of {site} hit its {timeout}s deadline with {len(not_done)} pages outstanding")
+
+    for future in futures:
+        if future not in done:
+            continue
+        url, text = future.result()
+        if not is_scraped(text):
+            continue
+        for category in plan[url]:
+            pages.setdefault(category, []).append({'url': url, 'text': text})
+
+    publish('info', site, f"Crawled {len(done)} pages of {site}, covering {', '.join(sorted(pages)) or 'no categories'}")
+    return pages
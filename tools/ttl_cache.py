@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.environ.get("KLAIM_CACHE_DIR", ".cache")
+
+
+def make_cache_key(*parts):
+    """Stable hash of any JSON-serializable key parts."""
+    raw = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class SQLiteStore:
+    """On-disk tier shared by every TTLCache namespace."""
+    def __init__(self, path=None):
+        if path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            path = os.path.join(CACHE_DIR, "ttl_cache.sqlite3")
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                namespace TEXT,
+                key TEXT,
+                value TEXT,
+                expires_at REAL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, namespace, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None, None
+        return json.loads(row[0]), row[1]
+
+    def set(self, namespace, key, value, expires_at):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), expires_at)
+            )
+            self._conn.commit()
+
+    def purge_expired(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_disk_store():
+    """Return the shared on-disk store, or None if it cannot be opened."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            try:
+                _store = SQLiteStore()
+            except Exception as e:
+                logger.warning(f"On-disk cache disabled: {str(e)}")
+                _store = False
+        return _store or None
+
+
+class TTLCache:
+    """
+    In-memory LRU cache with a time to live and an optional on-disk tier.
+
+    Values must be JSON-serializable when the disk tier is enabled. Hit and
+    miss counters are kept per tier and exposed through stats().
+    """
+    def __init__(self, namespace, maxsize=512, ttl=3600, disk=False):
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.use_disk = disk
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def disk(self):
+        # Opened lazily so that importing a module with a cache has no side effects
+        return get_disk_store() if self.use_disk else None
+
+    def _remember(self, key, value, expires_at):
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._data.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[0]
+                del self._data[key]
+
+        disk = self.disk
+        if disk is not None:
+            value, expires_at = disk.get(self.namespace, key)
+            if expires_at is not None:
+                with self._lock:
+                    self._remember(key, value, expires_at)
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._remember(key, value, expires_at)
+        disk = self.disk
+        if disk is not None:
+            try:
+                disk.set(self.namespace, key, value, expires_at)
+            except Exception as e:
+                logger.warning(f"Could not persist {self.namespace} cache entry: {str(e)}")
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (hits / lookups) if lookups else 0.0,
+                'size': len(self._data)
+            }
@@ -0,0 +1,92 @@
+import threading
+import logging
+from concurrent.futures import Future
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+logger = logging.getLogger(__name__)
+
+TRACKING_PARAMS = ('utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content',
+                   'gclid', 'fbclid', 'msclkid', 'srsltid')
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL so that trivially different links to the same page compare equal.
+
+    Lowercases scheme and host, drops "www.", default ports, fragments, tracking
+    parameters and trailing slashes, and sorts the query string.
+    """
+    parsed = urlparse(url.strip())
+    scheme = (parsed.scheme or 'http').lower()
+    host = (parsed.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    netloc = host
+    if parsed.port and not ((scheme == 'http' and parsed.port == 80) or (scheme == 'https' and parsed.port == 443)):
+        netloc = f"{host}:{parsed.port}"
+
+    path = parsed.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+             if k.lower() not in TRACKING_PARAMS]
+    query.sort()
+
+    # http and https versions of a page are the same page for our purposes
+    return urlunparse(('https' if scheme == 'http' else scheme, netloc, path, '', urlencode(query), ''))
+
+
+class UrlRegistry:
+    """
+    Per-run registry that fetches each normalized URL only once.
+
+    The first caller for a URL performs the fetch; every other caller (from any
+    category or thread) waits for and shares the same result.
+    """
+    def __init__(self):
+        self._futures = {}
+        self._lock = threading.Lock()
+        self.requested = 0
+        self.fetched = 0
+
+    def claim(self, url, variant=None):
+        """
+        Return (future, owner) for a URL. When owner is True the caller must
+        perform the fetch and resolve the future with set_result/set_exception.
+        A variant (e.g. a PDF extraction mode) is registered separately from the plain URL.
+        """
+        key = normalize_url(url)
+        if variant:
+            key = f"{key}#{variant}"
+        with self._lock:
+            self.requested += 1
+            future = self._futures.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._futures[key] = future
+            self.fetched += 1
+            return future, True
+
+    def fetch(self, url, fetch_func, variant=None):
+        """Fetch a URL through the registry, calling fetch_func(url) at most once per normalized URL and variant."""
+        future, owner = self.claim(url, variant)
+        if owner:
+            try:
+                future.set_result(fetch_func(url))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            logger.info(f"Reusing fetched content for {url}")
+        return future.result()
+
+    def stats(self):
+        with self._lock:
+            duplicates = self.requested - self.fetched
+            return {
+                'requested': self.requested,
+                'fetched': self.fetched,
+                'duplicates_skipped': duplicates,
+                'duplicate_rate': (duplicates / self.requested) if self.requested else 0.0
+            }